@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from api.client import get_client
+
+DEFAULT_BULK_CONCURRENCY = int(os.getenv("API_BULK_CONCURRENCY", "16"))
+
+
+class AsyncApiClient:
+    """Awaitable facade over the pooled ApiClient.
+
+    Calls run on a dedicated executor sized to the client's connection pool,
+    so concurrent awaits share the same keep-alive connections as sync callers.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = client.base_url
+        self._executor = ThreadPoolExecutor(max_workers=client.pool_maxsize,
+                                            thread_name_prefix="api-client")
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def request(self, method, endpoint, **kwargs):
+        return await self.run(self.client.request, method, endpoint, **kwargs)
+
+    async def get(self, endpoint, **kwargs):
+        return await self.request('GET', endpoint, **kwargs)
+
+    async def post(self, endpoint, **kwargs):
+        return await self.request('POST', endpoint, **kwargs)
+
+    async def put(self, endpoint, **kwargs):
+        return await self.request('PUT', endpoint, **kwargs)
+
+    async def delete(self, endpoint, **kwargs):
+        return await self.request('DELETE', endpoint, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_async_clients = {}
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(base_url, token=None):
+    """Returns the process-wide async client wrapping ``get_client(base_url, token)``."""
+    key = (base_url.rstrip('/'), token)
+    async_client = _async_clients.get(key)
+    if async_client is None:
+        with _async_clients_lock:
+            async_client = _async_clients.get(key)
+            if async_client is None:
+                async_client = AsyncApiClient(get_client(base_url, token))
+                _async_clients[key] = async_client
+    return async_client
+
+
+async def gather_bounded(func, items, limit=DEFAULT_BULK_CONCURRENCY):
+    """Awaits ``func(item)`` for every item with at most ``limit`` in flight.
+
+    Items are pulled lazily from the iterable and results are returned in
+    input order.
+    """
+    iterator = enumerate(items)
+    results = {}
+
+    async def worker():
+        for index, item in iterator:
+            results[index] = await func(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, limit))))
+    return [results[i] for i in range(len(results))]
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "30"))
+DEFAULT_CACHE_MAXSIZE = int(os.getenv("API_CACHE_MAXSIZE", "1024"))
+
+
+def normalize_path(endpoint: str) -> str:
+    return endpoint.strip('/')
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body, etag, expires_at):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Bounded LRU + TTL cache for GET response bodies.
+
+    Entries are keyed by normalised path and query params. Expired entries
+    that carry an ETag are kept so the client can revalidate them with
+    ``If-None-Match`` instead of downloading the body again.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_MAXSIZE, ttl=DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "revalidations": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def make_key(endpoint, params=None):
+        path = normalize_path(endpoint)
+        if not params:
+            return path, ()
+        items = params.items() if isinstance(params, dict) else params
+        return path, tuple(sorted((str(k), str(v)) for k, v in items))
+
+    def lookup(self, key):
+        """Returns ``(entry, fresh)``; ``entry`` is None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, False
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry, True
+            if entry.etag is None:
+                del self._entries[key]
+                self._stats["misses"] += 1
+                return None, False
+            return entry, False
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def store(self, key, body, etag=None, generation=None):
+        """Stores a body unless an invalidation happened since ``generation`` was read."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = CacheEntry(body, etag, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def record_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def revalidated(self, key, entry):
+        with self._lock:
+            entry.expires_at = time.monotonic() + self.ttl
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._stats["revalidations"] += 1
+
+    def invalidate(self, endpoint):
+        """Drops entries for ``endpoint``, its sub-resources and its parent collections."""
+        path = normalize_path(endpoint)
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if key[0] == path
+                or key[0].startswith(path + '/')
+                or path.startswith(key[0] + '/')
+                or not key[0]
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._generation += 1
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["maxsize"] = self.maxsize
+            stats["ttl"] = self.ttl
+        lookups = stats["hits"] + stats["misses"] + stats["revalidations"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["revalidations"]) / lookups, 4) if lookups else 0.0
+        return stats
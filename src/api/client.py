@@ -1,17 +1,183 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from api.cache import ResponseCache
+from api.rate_limit import get_limiter, get_retry_budget, parse_retry_after, backoff_delay
+from metrics.registry import counter_function, gauge, histogram
+
+DEFAULT_POOL_CONNECTIONS = int(os.getenv("API_POOL_CONNECTIONS", "10"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("API_POOL_MAXSIZE", "32"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+DEFAULT_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+# Path segments following one of these nouns are identifiers; they are
+# replaced by placeholders so metrics are labelled per route, not per object.
+ENDPOINT_PLACEHOLDERS = {
+    'organization': ('{orgname}',),
+    'repository': ('{namespace}', '{repository}'),
+    'team': ('{teamname}',),
+    'robots': ('{robot_shortname}',),
+    'user': ('{username}',),
+    'users': ('{username}',),
+    'members': ('{membername}',),
+    'tag': ('{tag}',),
+    'manifest': ('{manifestref}',),
+}
+
+REQUEST_SECONDS = histogram(
+    'quay_api_request_duration_seconds',
+    'Latency of ApiClient.request calls, including retries and cache lookups.',
+    ('method', 'endpoint', 'status'),
+)
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(endpoint):
+    """Maps ``organization/my-org/proxycache`` to ``organization/{orgname}/proxycache``."""
+    parts = []
+    pending = ()
+    for segment in endpoint.strip('/').split('/'):
+        if pending:
+            parts.append(pending[0])
+            pending = pending[1:]
+            continue
+        parts.append(segment)
+        pending = ENDPOINT_PLACEHOLDERS.get(segment, ())
+    template = '/'.join(parts)
+    return template + '/' if endpoint.endswith('/') else template
+
 
 class ApiClient:
-    def __init__(self, base_url, token=None):
+    def __init__(self, base_url, token=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES):
         self.base_url = base_url.rstrip('/')
-        self.headers = {'Content-Type': 'application/json'}
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
         if token:
             self.headers['Authorization'] = f'Bearer {token}'
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.limiter = get_limiter(self.base_url)
+        self.retry_budget = get_retry_budget(self.base_url)
+        self.cache = ResponseCache()
+
+        # One long-lived session per client: connections are kept alive and
+        # reused across calls instead of paying a TCP+TLS handshake each time.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=0, pool_block=False)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url_for(self, endpoint):
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def send(self, method, endpoint, **kwargs):
+        """Sends a request over the pooled session and returns the raw response."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, self.url_for(endpoint), **kwargs)
+
+    def _should_retry(self, method, attempt, status=None):
+        if attempt >= self.max_retries:
+            return False
+        # A 429 means the request was rejected before being processed, so even
+        # POSTs are safe to replay; anything else is only retried if idempotent.
+        if status != 429 and method not in IDEMPOTENT_METHODS:
+            return False
+        return self.retry_budget.try_withdraw()
 
-    def request(self, method, endpoint, **kwargs):
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        response = requests.request(method, url, headers=self.headers, **kwargs)
+    def _send_with_retries(self, method, endpoint, **kwargs):
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                response = self.send(method, endpoint, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self._should_retry(method, attempt):
+                    raise
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 429:
+                self.limiter.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+            else:
+                self.limiter.on_success()
+
+            if response.status_code in RETRYABLE_STATUS and self._should_retry(method, attempt, response.status_code):
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            return response
+
+    def request(self, method, endpoint, invalidates=(), **kwargs):
+        method = method.upper()
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            if method == 'GET' and self.cache.enabled:
+                status, body = self._cached_get(endpoint, **kwargs)
+            else:
+                status, body = self._uncached(method, endpoint, invalidates, **kwargs)
+            return json.loads(body) if body else {}
+        except requests.HTTPError as e:
+            if e.response is not None:
+                status = e.response.status_code
+            raise
+        finally:
+            REQUEST_SECONDS.labels(method, endpoint_template(endpoint), str(status)).observe(
+                time.perf_counter() - started)
+
+    def _uncached(self, method, endpoint, invalidates, **kwargs):
+        try:
+            response = self._send_with_retries(method, endpoint, **kwargs)
+        finally:
+            if method != 'HEAD' and self.cache.enabled:
+                for path in (endpoint, *invalidates):
+                    self.cache.invalidate(path)
         response.raise_for_status()
-        return response.json() if response.text else {}
+        return response.status_code, response.text
+
+    def _cached_get(self, endpoint, **kwargs):
+        """Returns ``(status, body)``; status is ``cached`` for a fresh hit served without a request."""
+        key = self.cache.make_key(endpoint, kwargs.get('params'))
+        entry, fresh = self.cache.lookup(key)
+        if entry is not None and fresh:
+            return 'cached', entry.body
+
+        generation = self.cache.generation
+        if entry is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'If-None-Match': entry.etag}
+        response = self._send_with_retries('GET', endpoint, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.cache.revalidated(key, entry)
+            return 304, entry.body
+        if entry is not None:
+            self.cache.record_miss()
+
+        response.raise_for_status()
+        body = response.text
+        self.cache.store(key, body, response.headers.get('ETag'), generation)
+        return response.status_code, body
 
     def get(self, endpoint, **kwargs):
         return self.request('GET', endpoint, **kwargs)
@@ -23,4 +189,88 @@ class ApiClient:
         return self.request('PUT', endpoint, **kwargs)
 
     def delete(self, endpoint, **kwargs):
-        return self.request('DELETE', endpoint, **kwargs)
\ No newline at end of file
+        return self.request('DELETE', endpoint, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url, token=None, **kwargs):
+    """Returns the process-wide client for ``base_url``, creating it on first use."""
+    key = (base_url.rstrip('/'), token)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = ApiClient(base_url, token, **kwargs)
+                _clients[key] = client
+    return client
+
+
+def cache_stats():
+    """Returns response cache counters for every shared client, keyed by base URL."""
+    return {client.base_url: client.cache.stats() for client in _shared_clients()}
+
+
+def _shared_clients():
+    with _clients_lock:
+        return list(_clients.values())
+
+
+def _cache_samples():
+    for client in _shared_clients():
+        stats = client.cache.stats()
+        for event in ('hits', 'misses', 'revalidations', 'evictions', 'invalidations'):
+            yield (client.base_url, event), stats[event]
+
+
+def _connection_pools():
+    for client in _shared_clients():
+        pools = client.session.get_adapter(client.base_url).poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is not None:
+                yield client, f"{pool.scheme}://{pool.host}:{pool.port}", pool
+
+
+def _pool_samples():
+    for client, origin, pool in _connection_pools():
+        # urllib3 pre-fills the queue with None placeholders for unopened slots.
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+        yield (origin, 'idle'), idle
+        yield (origin, 'maxsize'), client.pool_maxsize
+
+
+def _pool_event_samples():
+    for _, origin, pool in _connection_pools():
+        yield (origin, 'connections_opened'), pool.num_connections
+        yield (origin, 'requests'), pool.num_requests
+
+
+def _limiter_samples():
+    for client in _shared_clients():
+        yield (client.base_url,), client.limiter.rate
+
+
+counter_function('quay_api_cache_events_total', 'Response cache events per API client.',
+                 ('base_url', 'event'), _cache_samples)
+gauge('quay_api_cache_entries', 'Entries held in each API response cache.', ('base_url',),
+      lambda: (((c.base_url,), c.cache.stats()['size']) for c in _shared_clients()))
+gauge('quay_api_pool_connections', 'Idle and maximum pooled connections per origin.', ('origin', 'state'),
+      _pool_samples)
+counter_function('quay_api_pool_events_total', 'Connections opened and requests sent per origin.',
+                 ('origin', 'event'), _pool_event_samples)
+gauge('quay_api_rate_limit', 'Current adaptive request rate limit (requests/second).', ('base_url',),
+      _limiter_samples)
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
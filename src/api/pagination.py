@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+# Prefetches are short blocking GETs; a few threads serve every open iterator.
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-prefetch")
+
+
+def _next_params(params: Optional[Dict[str, Any]], page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    next_page = page.get("next_page")
+    if not next_page:
+        return None
+    return {**(params or {}), "next_page": next_page}
+
+
+def name_prefix_filter(prefix: Optional[str], field: str = "name") -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Returns a predicate keeping items whose ``field`` starts with ``prefix``, or None for no prefix."""
+    if not prefix:
+        return None
+    return lambda item: str(item.get(field, "")).startswith(prefix)
+
+
+def iter_paginated(client, endpoint: str, items_key: str, params: Optional[Dict[str, Any]] = None,
+                   predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                   prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+    """Yields the ``items_key`` entries of every page, following Quay's ``next_page`` tokens.
+
+    While the items of one page are consumed, the next page is already being
+    fetched, so at most two pages are held in memory. ``predicate`` drops
+    items before they reach the caller. Stopping early cancels a prefetch
+    that has not started yet; one already in flight still completes (and
+    still takes a rate limiter token), and its result or error is discarded.
+    """
+    page = client.get(endpoint, params=params)
+    while page is not None:
+        next_params = _next_params(params, page)
+        pending = None
+        if next_params is not None and prefetch:
+            pending = _prefetch_executor.submit(client.get, endpoint, params=next_params)
+        try:
+            for item in page.get(items_key, []):
+                if predicate is None or predicate(item):
+                    yield item
+        except BaseException:
+            # Closed early or the predicate raised: drop the prefetch, and
+            # collect its error if it was already running.
+            if pending is not None and not pending.cancel():
+                pending.add_done_callback(lambda future: future.exception())
+            raise
+        if next_params is None:
+            break
+        page = pending.result() if pending is not None else client.get(endpoint, params=next_params)
+        params = next_params
+
+
+async def aiter_paginated(client, endpoint: str, items_key: str, params: Optional[Dict[str, Any]] = None,
+                          predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                          prefetch: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of ``iter_paginated`` for an ``AsyncApiClient``."""
+    page = await client.get(endpoint, params=params)
+    while page is not None:
+        next_params = _next_params(params, page)
+        pending = None
+        if next_params is not None and prefetch:
+            pending = asyncio.ensure_future(client.get(endpoint, params=next_params))
+        try:
+            for item in page.get(items_key, []):
+                if predicate is None or predicate(item):
+                    yield item
+        except BaseException:
+            # Closed early or cancelled: do not leave the prefetch dangling.
+            if pending is not None:
+                pending.cancel()
+            raise
+        if next_params is None:
+            break
+        page = await pending if pending is not None else await client.get(endpoint, params=next_params)
+        params = next_params
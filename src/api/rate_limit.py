@@ -0,0 +1,145 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RATE = float(os.getenv("API_RATE_LIMIT", "50"))
+DEFAULT_MAX_RATE = float(os.getenv("API_RATE_LIMIT_MAX", "200"))
+DEFAULT_MIN_RATE = float(os.getenv("API_RATE_LIMIT_MIN", "1"))
+DEFAULT_BURST = int(os.getenv("API_RATE_BURST", "20"))
+DEFAULT_RETRY_BUDGET_RATIO = float(os.getenv("API_RETRY_BUDGET_RATIO", "0.2"))
+DEFAULT_RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("API_RETRY_BUDGET_MIN_PER_SEC", "2"))
+
+
+class TokenBucket:
+    """Adaptive token bucket shared by every client talking to one base URL.
+
+    Implemented as a virtual-scheduling bucket: each ``acquire`` reserves the
+    next free slot and sleeps until it, so waiting callers never spin. The rate
+    grows additively on success and halves on 429s (AIMD); a
+    ``Retry-After`` pauses all callers until the server says otherwise.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 min_rate=DEFAULT_MIN_RATE, max_rate=DEFAULT_MAX_RATE, increase=1.0,
+                 decrease_interval=1.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.decrease_interval = decrease_interval
+        self._last_decrease = 0.0
+        self._tat = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserves a slot and returns how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self.rate
+            tat = max(self._tat, now, self._blocked_until)
+            allow_at = max(tat - (self.burst - 1) * interval, self._blocked_until)
+            self._tat = tat + interval
+            return max(0.0, allow_at - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttled(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            # A burst of in-flight requests tends to be throttled together;
+            # count that as a single congestion signal rather than halving
+            # once per response.
+            if now - self._last_decrease >= self.decrease_interval:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_decrease = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent traffic.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one, with
+    a small floor of ``min_per_sec`` so low-traffic clients can still retry.
+    Once the budget is spent failures surface instead of multiplying load.
+    """
+
+    def __init__(self, ratio=DEFAULT_RETRY_BUDGET_RATIO, min_per_sec=DEFAULT_RETRY_BUDGET_MIN_PER_SEC,
+                 capacity=None):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = capacity if capacity is not None else max(10.0, min_per_sec * 10)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+
+    def record_request(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def parse_retry_after(value):
+    """Parses a ``Retry-After`` header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=0.2, cap=10.0):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+_limiters = {}
+_budgets = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(base_url) -> TokenBucket:
+    key = base_url.rstrip('/')
+    with _registry_lock:
+        if key not in _limiters:
+            _limiters[key] = TokenBucket()
+        return _limiters[key]
+
+
+def get_retry_budget(base_url) -> RetryBudget:
+    key = base_url.rstrip('/')
+    with _registry_lock:
+        if key not in _budgets:
+            _budgets[key] = RetryBudget()
+        return _budgets[key]
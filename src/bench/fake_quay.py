@@ -0,0 +1,204 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.quay.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.quay.handle(self, "POST")
+
+    def do_PUT(self):
+        self.server.quay.handle(self, "PUT")
+
+    def do_DELETE(self):
+        self.server.quay.handle(self, "DELETE")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeQuay:
+    """In-process stand-in for the Quay endpoints this project calls.
+
+    Serves ``organization/``, ``organization/{name}``,
+    ``organization/{name}/proxycache`` and a paginated, ETag-aware
+    ``superuser/organizations/`` under ``/api/v1``. Every request first
+    sleeps ``latency`` (plus up to ``jitter``) seconds, then fails with a
+    429 carrying ``Retry-After`` with probability ``throttle_rate``, or with
+    a 503 with probability ``error_rate``.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 0.05, page_size: int = 100,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.organizations: Dict[str, Dict[str, Any]] = {}
+        self.proxy_caches: Dict[str, Dict[str, Any]] = {}
+        self.counters = {"requests": 0, "throttled": 0, "errors": 0, "not_modified": 0}
+        self._version = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.quay = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "FakeQuay":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-quay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeQuay":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def seed_organizations(self, count: int, prefix: str = "org"):
+        with self._lock:
+            for i in range(count):
+                name = f"{prefix}{i}"
+                self.organizations[name] = {"name": name, "email": f"{name}@example.com"}
+            self._version += 1
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        with self._lock:
+            self.counters["requests"] += 1
+            roll = self._random.random()
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            self._count("throttled")
+            return self._send(request, 429, {"message": "rate limited"}, {"Retry-After": str(self.retry_after)})
+        if roll < self.throttle_rate + self.error_rate:
+            self._count("errors")
+            return self._send(request, 503, {"message": "injected failure"})
+
+        url = urlsplit(request.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        parts = [part for part in path.split("/") if part]
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return self._send(request, 400, {"message": "invalid JSON"})
+
+        # Handlers build the response under the lock; it is written after the
+        # lock is released, so a slow client cannot stall other requests.
+        if parts == ["superuser", "organizations"] and method == "GET":
+            response = self._list(request, parse_qs(url.query))
+        elif parts == ["organization"] and method == "POST":
+            response = self._create(payload)
+        elif len(parts) == 2 and parts[0] == "organization":
+            response = self._organization(method, parts[1], payload)
+        elif len(parts) == 3 and parts[0] == "organization" and parts[2] == "proxycache":
+            response = self._proxy_cache(method, parts[1], payload)
+        elif not parts and method == "GET":
+            response = (200, {"status": "ok"})
+        else:
+            response = (404, {"message": "not found"})
+        return self._send(request, *response)
+
+    def _list(self, request, query):
+        offset = int(query.get("next_page", ["0"])[0] or 0)
+        with self._lock:
+            etag = f'"{self._version}-{offset}"'
+            if request.headers.get("If-None-Match") == etag:
+                self.counters["not_modified"] += 1
+                return 304, None, {"ETag": etag}
+            names = sorted(self.organizations)[offset:offset + self.page_size]
+            page = {"organizations": [dict(self.organizations[name]) for name in names]}
+            if offset + self.page_size < len(self.organizations):
+                page["next_page"] = str(offset + self.page_size)
+        return 200, page, {"ETag": etag}
+
+    def _create(self, payload):
+        name, email = payload.get("name"), payload.get("email")
+        if not name or not email:
+            return 400, {"message": "name and email are required"}
+        with self._lock:
+            if name in self.organizations:
+                return 400, {"message": "A user or organization with this name already exists"}
+            self.organizations[name] = {"name": name, "email": email}
+            self._version += 1
+        return 201, "Created"
+
+    def _organization(self, method, name, payload):
+        with self._lock:
+            org = self.organizations.get(name)
+            if org is None:
+                return 404, {"message": "Not Found"}
+            if method == "GET":
+                return 200, dict(org)
+            if method == "PUT":
+                org.update({key: payload[key] for key in ("email",) if key in payload})
+                self._version += 1
+                return 200, dict(org)
+            if method == "DELETE":
+                del self.organizations[name]
+                self.proxy_caches.pop(name, None)
+                self._version += 1
+                return 204, None
+        return 405, {"message": "method not allowed"}
+
+    def _proxy_cache(self, method, name, payload):
+        with self._lock:
+            if name not in self.organizations:
+                return 404, {"message": "Not Found"}
+            if method == "GET":
+                return 200, dict(self.proxy_caches.get(name, {"upstream_registry": ""}))
+            if method == "POST":
+                self.proxy_caches[name] = {key: value for key, value in payload.items()
+                                           if key != "upstream_registry_password"}
+                return 201, "Created"
+            if method == "DELETE":
+                self.proxy_caches.pop(name, None)
+                return 204, None
+        return 405, {"message": "method not allowed"}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _send(self, request, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        request.send_response(status)
+        if data:
+            request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        if data:
+            request.wfile.write(data)
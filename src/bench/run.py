@@ -0,0 +1,411 @@
+"""Offline benchmarks against an in-process fake Quay.
+
+Run from ``src``::
+
+    python -m bench.run --out ../bench-results.json
+    python -m bench.run --suite yaml --suite pipeline --baseline ../bench-results.json
+
+Every scenario reports metrics as ``{"value", "unit", "better"}`` so two
+result files can be compared mechanically; ``--baseline`` prints the change
+per metric and exits non-zero when one regresses beyond ``--tolerance``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+from bench.fake_quay import FakeQuay
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def latency_metrics(samples: List[float], prefix: str = "latency") -> Dict[str, Any]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        f"{prefix}_p50": metric(pick(0.50), "s"),
+        f"{prefix}_p95": metric(pick(0.95), "s"),
+        f"{prefix}_p99": metric(pick(0.99), "s"),
+        f"{prefix}_mean": metric(statistics.fmean(ordered), "s"),
+    }
+
+
+def timed(func: Callable[[], Any]):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    """Minimum of ``repeat`` timings; sub-millisecond operations are too noisy for a single run."""
+    return min(timed(func)[1] for _ in range(max(1, repeat)))
+
+
+def use_fake_quay(quay: FakeQuay, rate_limit: float = 0.0):
+    os.environ["API_BASE_URL"] = quay.url
+    os.environ["API_TOKEN"] = "bench-token"
+    from services.container import CONTAINER
+    CONTAINER.reset()
+    if rate_limit:
+        from api.rate_limit import get_limiter
+        limiter = get_limiter(quay.url)
+        limiter.rate = limiter.max_rate = rate_limit
+
+
+def bench_bulk_create(args) -> List[Dict[str, Any]]:
+    from services.organization_service import AsyncOrganizationService
+
+    results = []
+    for label, faults in (("clean", {}), ("faulty", {"throttle_rate": 0.05, "error_rate": 0.01})):
+        with FakeQuay(latency=args.latency, seed=1, **faults) as quay:
+            use_fake_quay(quay, args.rate_limit)
+            service = AsyncOrganizationService(concurrency=args.concurrency)
+            orgs = [{"name": f"bench{i}", "email": f"bench{i}@example.com"} for i in range(args.orgs)]
+            outcome, elapsed = timed(lambda: asyncio.run(service.create_organizations_from_list(orgs)))
+            created = sum(1 for entry in outcome if entry["status"] == "created")
+            results.append({
+                "name": f"bulk_create.{label}",
+                "params": {"orgs": args.orgs, "concurrency": args.concurrency, "latency": args.latency, **faults},
+                "metrics": {
+                    "wall": metric(elapsed, "s"),
+                    "throughput": metric(args.orgs / elapsed, "orgs/s", "higher"),
+                    "created": metric(created, "orgs", "higher"),
+                    "server_requests": metric(quay.counters["requests"], "requests"),
+                },
+            })
+    return results
+
+
+def bench_list_organizations(args) -> List[Dict[str, Any]]:
+    from services.organization_service import OrganizationService
+
+    with FakeQuay(latency=args.latency, seed=1) as quay:
+        quay.seed_organizations(args.orgs)
+        use_fake_quay(quay)
+        service = OrganizationService()
+        service.client.cache.ttl = 0.5
+        _, cold = timed(service.list_organizations)
+        _, cached = timed(service.list_organizations)
+        time.sleep(0.5)  # let the entries expire so the next listing revalidates them by ETag
+        _, revalidated = timed(service.list_organizations)
+
+        # Streaming with per-item work: prefetching overlaps the next page with consumption.
+        service.client.cache.ttl = 0
+
+        def consume(prefetch):
+            for _ in service.iter_organizations(prefetch=prefetch):
+                time.sleep(args.latency / quay.page_size)
+
+        _, streamed = timed(lambda: consume(True))
+        _, streamed_serial = timed(lambda: consume(False))
+        return [{
+            "name": "list_organizations",
+            "params": {"orgs": args.orgs, "page_size": quay.page_size, "latency": args.latency},
+            "metrics": {
+                "cold": metric(cold, "s"),
+                "cached": metric(cached, "s"),
+                "revalidated": metric(revalidated, "s"),
+                "streamed_prefetch": metric(streamed, "s"),
+                "streamed_serial": metric(streamed_serial, "s"),
+                "not_modified": metric(quay.counters["not_modified"], "responses", "higher"),
+            },
+        }]
+
+
+def bench_proxy_caches(args) -> List[Dict[str, Any]]:
+    from services.porxy_cache_service import AsyncProxyCacheService
+
+    registries = ("docker.io", "ghcr.io", "quay.io")
+    with FakeQuay(latency=args.latency, seed=1) as quay:
+        quay.seed_organizations(args.orgs, prefix="mirror")
+        use_fake_quay(quay, args.rate_limit)
+        service = AsyncProxyCacheService(concurrency=args.concurrency)
+        specs = [{"org_name": f"mirror{i}", "upstream_registry": registries[i % len(registries)]}
+                 for i in range(args.orgs)]
+        metrics = {}
+        for label in ("first_run", "rerun"):
+            before = quay.counters["requests"]
+            _, elapsed = timed(lambda: asyncio.run(service.ensure_proxy_caches(specs)))
+            metrics[label] = metric(elapsed, "s")
+            metrics[f"{label}_requests"] = metric(quay.counters["requests"] - before, "requests")
+        return [{"name": "proxy_caches.ensure", "params": {"orgs": args.orgs, "concurrency": args.concurrency},
+                 "metrics": metrics}]
+
+
+def bench_pipeline(args) -> List[Dict[str, Any]]:
+    from pipeline.compiler import PlanCompiler
+    from pipeline.scheduler import run_dag, CONTINUE_ON_ERROR
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs_file = tmp / "inputs.yaml"
+        inputs_file.write_text(yaml.safe_dump({"teams": [f"team{i}" for i in range(args.steps)]}))
+        generated = tmp / "struct.yaml"
+        generated.write_text(yaml.safe_dump({
+            "input_file": str(inputs_file),
+            "max_workers": args.concurrency,
+            "pipeline": [
+                {"name": "validate-env", "job": "validate-env", "needs": [], "enabled": True},
+                {"name": "create-team", "job": "create-team", "needs": ["validate-env"], "enabled": True,
+                 "foreach": "{{ inputs.teams }}", "params": {"team_name": "{{ item }}", "role": "admin"}},
+                {"name": "cleanup", "job": "cleanup", "needs": ["create-team"], "enabled": True},
+            ],
+        }))
+
+        cwd = os.getcwd()
+        os.chdir(ROOT)  # struct.yaml refers to inputs.yaml relative to the repo root
+        try:
+            for label, struct_file in (("struct_yaml", ROOT / "struct.yaml"), ("generated", generated)):
+                cache_dirs = iter(range(args.repeat))
+                cold = best_of(lambda: PlanCompiler(tmp / f"plans-{label}-{next(cache_dirs)}").compile(struct_file),
+                               args.repeat)
+                disk = best_of(lambda: PlanCompiler(tmp / f"plans-{label}-0").compile(struct_file), args.repeat)
+                compiler = PlanCompiler(tmp / f"plans-{label}-0")
+                plan = compiler.compile(struct_file)
+                memory = best_of(lambda: compiler.compile(struct_file), args.repeat)
+
+                def execute(step):
+                    if args.step_latency:
+                        time.sleep(args.step_latency)
+
+                scheduled = best_of(lambda: run_dag(list(plan.steps), execute, args.concurrency, CONTINUE_ON_ERROR),
+                                    args.repeat)
+                results.append({
+                    "name": f"pipeline.{label}",
+                    "params": {"steps": len(plan.steps), "workers": args.concurrency,
+                               "step_latency": args.step_latency},
+                    "metrics": {
+                        "compile_cold": metric(cold, "s"),
+                        "compile_disk_cache": metric(disk, "s"),
+                        "compile_memory_cache": metric(memory, "s"),
+                        "run_dag": metric(scheduled, "s"),
+                    },
+                })
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def bench_yaml(args) -> List[Dict[str, Any]]:
+    from models.quay_config import QuayConfig
+    from reader.yaml_diff import check_yaml_change, diff_yaml
+    from reader.yaml_reader import read_yaml, read_yaml_as
+    from reader.yaml_stream import iter_organizations
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config_file = tmp / "config.yaml"
+        orgs = [
+            {
+                "name": f"org{i}",
+                "email": f"org{i}@example.com",
+                "teams": [{"name": f"team{j}", "role": "member"} for j in range(3)],
+                "robots": [f"robot{j}" for j in range(2)],
+                "repositories": [{"name": f"repo{j}", "visibility": "private"} for j in range(3)],
+            }
+            for i in range(args.config_orgs)
+        ]
+        config_file.write_text(yaml.safe_dump({"organizations": orgs}, sort_keys=False))
+        storage = tmp / "storage"
+
+        old, parse = timed(lambda: read_yaml(config_file))
+        _, validate = timed(lambda: read_yaml_as(config_file, QuayConfig))
+        _, stream = timed(lambda: sum(1 for _ in iter_organizations(config_file)))
+        _, first_check = timed(lambda: check_yaml_change(storage, config_file))
+        unchanged_check = best_of(lambda: check_yaml_change(storage, config_file), args.repeat)
+
+        orgs[len(orgs) // 2]["email"] = "changed@example.com"
+        config_file.write_text(yaml.safe_dump({"organizations": orgs}, sort_keys=False))
+        result, changed_check = timed(lambda: check_yaml_change(storage, config_file))
+        _, diff = timed(lambda: diff_yaml(old, {"organizations": orgs}))
+
+        return [{
+            "name": "yaml",
+            "params": {"orgs": args.config_orgs, "bytes": config_file.stat().st_size},
+            "metrics": {
+                "parse": metric(parse, "s"),
+                "parse_and_validate": metric(validate, "s"),
+                "stream_validate": metric(stream, "s"),
+                "check_first": metric(first_check, "s"),
+                "check_unchanged": metric(unchanged_check, "s"),
+                "check_one_change": metric(changed_check, "s"),
+                "diff": metric(diff, "s"),
+                "diff_entries": metric(len(result.get("diff", {})), "entries"),
+            },
+        }]
+
+
+def bench_endpoints(args) -> List[Dict[str, Any]]:
+    import requests
+    import uvicorn
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, FakeQuay(latency=args.latency, seed=1) as quay:
+        tmp = Path(tmp)
+        quay.seed_organizations(args.orgs)
+        use_fake_quay(quay)
+        config_file = tmp / "config.yaml"
+        config_file.write_text(yaml.safe_dump(
+            {"organizations": [{"name": f"org{i}", "email": f"org{i}@example.com"} for i in range(args.orgs)]}
+        ))
+        os.environ.update({"YAML_FILE_PATH": str(config_file), "YAML_STORAGE_PATH": str(tmp / "storage"),
+                           "YAML_WATCH_ENABLED": "false", "HEALTH_PROBE_INTERVAL": "1"})
+        import main
+
+        server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=0, log_level="warning"))
+        thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        try:
+            etag = requests.get(f"{base}/yaml").headers.get("ETag", "")
+            for path, headers in (("/", {}), ("/ready", {}), ("/yaml", {}), ("/yaml", {"If-None-Match": etag}),
+                                  ("/yaml/check", {}), ("/metrics", {})):
+                samples, statuses, elapsed = _load(f"{base}{path}", headers, args.clients, args.requests)
+                name = path + (" (If-None-Match)" if headers else "")
+                results.append({
+                    "name": f"endpoint {name}",
+                    "params": {"clients": args.clients, "requests": args.requests},
+                    "metrics": {
+                        "throughput": metric(len(samples) / elapsed, "req/s", "higher"),
+                        **latency_metrics(samples),
+                        "errors": metric(sum(1 for s in statuses if s >= 500), "responses"),
+                    },
+                })
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+    return results
+
+
+def _load(url: str, headers: Dict[str, str], clients: int, requests_per_client: int):
+    import requests
+
+    def worker(_):
+        session = requests.Session()
+        samples, statuses = [], []
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            response = session.get(url, headers=headers)
+            samples.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+        session.close()
+        return samples, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(worker, range(clients)))
+    elapsed = time.perf_counter() - started
+    return ([s for samples, _ in outcomes for s in samples],
+            [s for _, statuses in outcomes for s in statuses], elapsed)
+
+
+SUITES = {
+    "bulk": bench_bulk_create,
+    "list": bench_list_organizations,
+    "proxy": bench_proxy_caches,
+    "pipeline": bench_pipeline,
+    "yaml": bench_yaml,
+    "endpoints": bench_endpoints,
+}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Prints per-metric changes and returns the metrics that regressed beyond ``tolerance``."""
+    previous = {entry["name"]: entry["metrics"] for entry in baseline.get("scenarios", [])}
+    regressions = []
+    for entry in current["scenarios"]:
+        for key, value in entry["metrics"].items():
+            old = previous.get(entry["name"], {}).get(key)
+            if not old or not old["value"]:
+                continue
+            if value["unit"] != "s" and value["better"] != "higher":
+                continue  # counts, not performance
+            change = (value["value"] - old["value"]) / old["value"]
+            worse = change > tolerance if value["better"] == "lower" else change < -tolerance
+            print(f"{'REGRESSED' if worse else 'ok':>9}  {entry['name']}.{key}: "
+                  f"{old['value']:.6g} -> {value['value']:.6g} {value['unit']} ({change:+.1%})")
+            if worse:
+                regressions.append(f"{entry['name']}.{key}")
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline benchmarks against a fake Quay.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (repeatable, default all)")
+    parser.add_argument("--out", default="bench-results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    parser.add_argument("--orgs", type=int, default=500, help="organizations for API and endpoint suites")
+    parser.add_argument("--config-orgs", type=int, default=20000, help="organizations in the generated YAML config")
+    parser.add_argument("--steps", type=int, default=1000, help="foreach steps in the generated pipeline")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake Quay latency per request in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="start the client rate limiter at this many req/s (default: API_RATE_LIMIT)")
+    parser.add_argument("--step-latency", type=float, default=0.0, help="simulated duration of each pipeline step")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent HTTP clients for the endpoint suite")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client for the endpoint suite")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions for sub-millisecond measurements")
+    parser.add_argument("--verbose", action="store_true", help="keep INFO logging from the services")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": [],
+    }
+    for suite in args.suite or list(SUITES):
+        print(f"Running {suite}...", file=sys.stderr)
+        report["scenarios"].extend(SUITES[suite](args))
+
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    for entry in report["scenarios"]:
+        summary = ", ".join(f"{key}={value['value']:.6g}{value['unit']}" for key, value in entry["metrics"].items())
+        print(f"{entry['name']}: {summary}")
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
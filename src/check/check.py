@@ -1,7 +1,8 @@
 import os
-import requests
 import logging
 from pathlib import Path
+from api.client import get_client
+from services.container import ENV_DEFAULTS
 
 logging.basicConfig(level=logging.INFO)
 
@@ -11,50 +12,62 @@ def check_env():
     details = []
     missing_vars = []
 
+    # Runs on every health probe, so per-variable results are only logged at debug level.
     for var in required_env_vars:
         value = os.getenv(var)
-        if not value:
-            logging.error(f"Environment variable {var} is missing.")
-            details.append({"name": var, "status": "missing", "value": None})
-            missing_vars.append(var)
-        else:
+        if value:
             display_value = "*****" if var in secret_vars else value
-            logging.info(f"Environment variable {var} is set.")
+            logging.debug("Environment variable %s is set.", var)
             details.append({"name": var, "status": "ok", "value": display_value})
+        elif var in ENV_DEFAULTS:
+            logging.debug("Environment variable %s is not set, using default '%s'.", var, ENV_DEFAULTS[var])
+            details.append({"name": var, "status": "default", "value": ENV_DEFAULTS[var]})
+        else:
+            logging.debug("Environment variable %s is missing.", var)
+            details.append({"name": var, "status": "missing", "value": None})
+            missing_vars.append(var)
 
     summary_status = "error" if missing_vars else "ok"
     if missing_vars:
-        logging.error(f"Missing environment variables: {missing_vars}")
-    else:
-        logging.info("All required environment variables are set.")
+        logging.error("Missing environment variables: %s", missing_vars)
     return {"summary": {"status": summary_status}, "details": details}
 
-def check_api():
+def check_api(timeout=None):
     api_base_url = os.getenv("API_BASE_URL")
     if not api_base_url:
         logging.error("API_BASE_URL is not set, skipping API check.")
         return {"status": "error", "reason": "API_BASE_URL not set"}
     try:
-        response = requests.get(f"{api_base_url.rstrip('/')}/")
+        client = get_client(api_base_url, os.getenv("API_TOKEN"))
+        response = client.send("GET", "/", timeout=timeout or client.timeout)
+        # Rejected credentials and server errors make Quay unusable even
+        # though it answered, so they count as errors, not as reachable.
+        status = "error"
         if response.status_code == 401:
             reason = "unauthorized (missing or invalid token)"
         elif response.status_code == 403:
             reason = "forbidden (access denied)"
+        elif response.status_code >= 500:
+            reason = f"server error ({response.status_code})"
         elif response.status_code == 404:
-            reason = "not found (invalid endpoint)"
+            status, reason = "ok", "not found (invalid endpoint)"
         elif response.ok:
-            reason = "success"
+            status, reason = "ok", "success"
+        else:
+            status, reason = "ok", "unexpected response"
+        if status == "ok":
+            logging.debug("API is reachable (status %s): %s", response.status_code, reason)
         else:
-            reason = "unexpected response"
-        logging.info(f"API is reachable (status {response.status_code}): {reason}")
-        return {"status": "ok", "reason": reason}
+            logging.error("API check failed (status %s): %s", response.status_code, reason)
+        return {"status": status, "reason": reason}
     except Exception as e:
-        logging.error(f"Error checking API: {e}")
+        logging.error("Error checking API: %s", e)
         return {"status": "error", "reason": "unreachable or invalid response"}
 
-def check():
+def check(timeout=None):
     result_env = check_env()
-    result_api = check_api() if result_env.get("summary", {}).get("status") == "ok" else {"status": "error", "reason": "env check failed"}
+    # Readiness depends on Quay alone; check_api reports a missing API_BASE_URL itself.
+    result_api = check_api(timeout)
     return {"env": result_env, "api": result_api}
 
 def render_check_html(result: dict):
@@ -66,7 +79,7 @@ def render_check_html(result: dict):
         name = item.get("name", "")
         status = item.get("status", "")
         value = item.get("value", "")
-        css_class = "status-ok" if status == "ok" else "status-missing"
+        css_class = "status-ok" if status in ("ok", "default") else "status-missing"
         env_rows += f'<tr><td>{name}</td><td class="{css_class}">{status}</td><td>{value or "-"}</td></tr>\n'
 
     api_result = result.get("api", {})
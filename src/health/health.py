@@ -1,4 +1,5 @@
 from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 import logging
 
 router = APIRouter()
@@ -11,5 +12,17 @@ def live():
 
 @router.get("/ready", status_code=status.HTTP_200_OK)
 def ready():
+    """Reports the cached result of the background Quay probe; never calls Quay itself."""
+    from health.prober import get_health_prober
+    state = get_health_prober().state()
+    if state["status"] != "ready":
+        logging.warning("Readiness probe checked: not ready (%s)", state['api'].get('reason'))
+        return JSONResponse(content=state, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
     logging.info("Readiness probe checked: ready")
-    return {"status": "ready"}
\ No newline at end of file
+    return state
+
+@router.get("/health", status_code=status.HTTP_200_OK)
+def health():
+    """Returns the probe state including latency percentiles."""
+    from health.prober import get_health_prober
+    return get_health_prober().state()
@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from check.check import check
+
+logging.basicConfig(level=logging.INFO)
+
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+# Latency percentiles are computed over this many most recent probes.
+HEALTH_LATENCY_WINDOW = 100
+
+PENDING_RESULT = {
+    "env": {"summary": {"status": "pending"}, "details": []},
+    "api": {"status": "pending", "reason": "first probe has not completed"},
+}
+
+
+def percentile(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class HealthProber:
+    """Runs ``check.check()`` on a background thread and caches the outcome.
+
+    Request handlers only read the cached state, so a slow or unreachable
+    Quay never ties up the request threadpool. A result older than three
+    intervals counts as stale, which makes readiness fail if the prober
+    itself gets stuck.
+    """
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT,
+                 window: int = HEALTH_LATENCY_WINDOW):
+        self.interval = interval
+        self.timeout = timeout
+        self._latencies = deque(maxlen=window)
+        self._result: Dict[str, Any] = PENDING_RESULT
+        self._checked_at: Optional[float] = None
+        self._consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+
+    def probe(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            result = check(timeout=self.timeout)
+        except Exception as e:
+            logging.error("Health probe failed: %s", e)
+            result = {"env": {"summary": {"status": "error"}, "details": []},
+                      "api": {"status": "error", "reason": str(e)}}
+        latency = time.monotonic() - started
+        with self._lock:
+            self._result = result
+            self._checked_at = time.time()
+            self._latencies.append(latency)
+            if result["api"].get("status") == "ok":
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def result(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._result
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            fresh = self._checked_at is not None and time.time() - self._checked_at <= 3 * self.interval
+            return fresh and self._result["api"].get("status") == "ok"
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            checked_at = self._checked_at
+            failures = self._consecutive_failures
+            api = self._result["api"]
+        return {
+            "status": "ready" if self.is_ready() else "not ready",
+            "api": api,
+            "checked_at": checked_at,
+            "age": None if checked_at is None else round(time.time() - checked_at, 3),
+            "consecutive_failures": failures,
+            "latency": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+
+_prober: Optional[HealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_health_prober() -> HealthProber:
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            _prober = HealthProber()
+        return _prober
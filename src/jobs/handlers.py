@@ -0,0 +1,81 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from jobs.queue import Job, JobQueue
+
+logging.basicConfig(level=logging.INFO)
+
+RECONCILE = "reconcile"
+ORGANIZATION_CREATE = "organization.create"
+ORGANIZATION_UPDATE = "organization.update"
+
+
+def enqueue_reconcile(queue: JobQueue, change: Dict[str, Any]) -> Job:
+    """Queues one reconcile per snapshot revision, however many replicas saw the change."""
+    revision = change.get("revision")
+    key = f"reconcile:{revision}" if revision is not None else None
+    return queue.enqueue(RECONCILE, {"revision": revision}, idempotency_key=key)
+
+
+def newest_revision(queue: JobQueue) -> Optional[int]:
+    """The highest snapshot revision any reconcile job was queued for, applied or not."""
+    row = queue.connection().execute(
+        "SELECT MAX(CAST(json_extract(payload, '$.revision') AS INTEGER)) AS revision FROM jobs WHERE kind = ?",
+        (RECONCILE,),
+    ).fetchone()
+    return row["revision"]
+
+
+def _superseded(queue: JobQueue, revision: Optional[int]) -> Optional[Dict[str, Any]]:
+    newest = newest_revision(queue)
+    if revision is None or newest is None or newest <= revision:
+        return None
+    logging.info("Skipping job for revision %s; revision %s supersedes it.", revision, newest)
+    return {"skipped": f"superseded by revision {newest}"}
+
+
+def reconcile_handlers(queue: JobQueue, load_config: Callable[[Optional[int]], Any]
+                       ) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """Handlers that plan a reconcile once and fan its organization changes out as jobs.
+
+    The plan is computed by whichever replica runs the ``reconcile`` job
+    (the leader) from ``load_config(revision)``, the config of the snapshot
+    the job was queued for, so a retried or late job still applies that
+    revision; every create and update becomes its own job keyed by the
+    revision and organization, so any replica may execute it, exactly once.
+    Jobs of a revision older than the newest queued one are skipped, both
+    before planning and before each change, so a retried or late job cannot
+    revert a newer revision.
+    """
+    from services.container import get_organization_planner, get_organization_service
+
+    def reconcile(payload):
+        revision = payload.get("revision")
+        skipped = _superseded(queue, revision)
+        if skipped is not None:
+            return skipped
+        plan = get_organization_planner().plan(load_config(revision))
+        prefix = f"reconcile:{revision}"
+        job_ids = []
+        for kind, action, entries in ((ORGANIZATION_CREATE, "create", plan.create),
+                                      (ORGANIZATION_UPDATE, "update", plan.update)):
+            for org in entries:
+                job = queue.enqueue(kind, {"name": org["name"], "email": org["email"], "revision": revision},
+                                    idempotency_key=f"{prefix}:{action}:{org['name']}")
+                job_ids.append(job.id)
+        return {"plan": plan.to_dict(), "jobs": job_ids}
+
+    def create(payload):
+        skipped = _superseded(queue, payload.get("revision"))
+        if skipped is not None:
+            return skipped
+        return get_organization_service().create_organization(payload["name"], payload["email"])
+
+    def update(payload):
+        skipped = _superseded(queue, payload.get("revision"))
+        if skipped is not None:
+            return skipped
+        return get_organization_service().update_organization(payload["name"], payload["email"])
+
+    return {RECONCILE: reconcile, ORGANIZATION_CREATE: create, ORGANIZATION_UPDATE: update}
+
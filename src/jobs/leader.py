@@ -0,0 +1,144 @@
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from jobs.queue import DEFAULT_RETENTION_SECONDS, JobQueue
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "15"))
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+
+def default_identity() -> str:
+    """Pod name under Kubernetes (the hostname), plus the pid for several processes per host."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElection:
+    """Lease-based leader election on the ``leases`` table of a ``JobQueue`` database.
+
+    The holder renews its lease every third of ``lease_seconds``; when it
+    stops, another candidate takes over once the lease has expired. Each
+    change of holder increments ``term``. Leadership is only claimed locally
+    until the lease would have expired, so a holder that cannot reach the
+    database steps down on its own before anyone else can take over.
+
+    While leading, the loop also prunes jobs that finished more than
+    ``retention_seconds`` ago, at most once per ``prune_interval``; None
+    disables pruning.
+    """
+
+    def __init__(self, queue: JobQueue, name: str = "reconcile", identity: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEADER_LEASE_SECONDS,
+                 retention_seconds: Optional[float] = DEFAULT_RETENTION_SECONDS,
+                 prune_interval: float = PRUNE_INTERVAL_SECONDS):
+        self.queue = queue
+        self.name = name
+        self.identity = identity or default_identity()
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self.term = 0
+        self._valid_until = 0.0
+        self._next_prune = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        """Takes or renews the lease if it is free, expired or already ours."""
+        started = time.monotonic()
+        now = time.time()
+        try:
+            with self.queue.transaction() as conn:
+                row = conn.execute("SELECT holder, expires_at, term FROM leases WHERE name = ?",
+                                   (self.name,)).fetchone()
+                if row is not None and row["holder"] != self.identity and row["expires_at"] > now:
+                    acquired = False
+                else:
+                    term = row["term"] if row is not None and row["holder"] == self.identity else (
+                        (row["term"] if row is not None else 0) + 1)
+                    conn.execute(
+                        "INSERT INTO leases (name, holder, expires_at, term) VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT(name) DO UPDATE SET holder = excluded.holder,"
+                        " expires_at = excluded.expires_at, term = excluded.term",
+                        (self.name, self.identity, now + self.lease_seconds, term),
+                    )
+                    acquired = True
+        except Exception as e:
+            logging.error("Leader election for '%s' failed: %s", self.name, e)
+            acquired = False
+
+        was_leader = self.is_leader
+        if acquired:
+            self._valid_until = started + self.lease_seconds
+            if not was_leader or term != self.term:
+                logging.info("'%s' is now leader for '%s' (term %s).", self.identity, self.name, term)
+            self.term = term
+        elif was_leader and not self.is_leader:
+            logging.warning("'%s' lost leadership for '%s'.", self.identity, self.name)
+        return acquired
+
+    def release(self):
+        """Gives the lease up so another candidate does not have to wait for it to expire."""
+        self._valid_until = 0.0
+        try:
+            with self.queue.transaction() as conn:
+                conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ?",
+                             (self.name, self.identity))
+        except Exception as e:
+            logging.error("Releasing leadership for '%s' failed: %s", self.name, e)
+
+    def state(self) -> Dict[str, Any]:
+        row = self.queue.connection().execute("SELECT holder, expires_at, term FROM leases WHERE name = ?",
+                                              (self.name,)).fetchone()
+        return {
+            "name": self.name,
+            "identity": self.identity,
+            "is_leader": self.is_leader,
+            "holder": row["holder"] if row is not None else None,
+            "term": row["term"] if row is not None else 0,
+            "expires_in": max(0.0, row["expires_at"] - time.time()) if row is not None else 0.0,
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"leader-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.is_leader:
+            self.release()
+
+    def prune_if_due(self) -> int:
+        """Prunes finished jobs when leading and the interval has passed; returns the number removed."""
+        if self.retention_seconds is None or not self.is_leader or time.monotonic() < self._next_prune:
+            return 0
+        self._next_prune = time.monotonic() + self.prune_interval
+        try:
+            removed = self.queue.prune(self.retention_seconds)
+        except Exception as e:
+            logging.error("Pruning finished jobs failed: %s", e)
+            return 0
+        if removed:
+            logging.info("Pruned %s finished job(s) older than %ss.", removed, self.retention_seconds)
+        return removed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.try_acquire()
+            self.prune_if_due()
+            self._stop.wait(self.lease_seconds / 3)
@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs (and so their idempotency keys) are kept this long.
+DEFAULT_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+TERMINAL = (DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    term INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    idempotency_key: Optional[str]
+    status: str
+    attempts: int
+    max_attempts: int
+    lease_owner: Optional[str]
+    lease_expires: Optional[float]
+    result: Any
+    error: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"], kind=row["kind"], payload=json.loads(row["payload"]),
+            idempotency_key=row["idempotency_key"], status=row["status"], attempts=row["attempts"],
+            max_attempts=row["max_attempts"], lease_owner=row["lease_owner"], lease_expires=row["lease_expires"],
+            result=json.loads(row["result"]) if row["result"] is not None else None, error=row["error"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__dataclass_fields__}
+
+
+class JobQueue:
+    """Durable work queue in one SQLite file, shared by every process that opens it.
+
+    ``enqueue`` with an idempotency key returns the existing job instead of
+    adding a second one, so replicas reacting to the same event queue the
+    work once. ``claim`` hands a job to one worker under a lease; a worker
+    that dies stops renewing it and the job becomes claimable again once the
+    lease runs out. ``complete`` and ``fail`` only count for the current
+    lease holder, so a worker whose lease was taken over cannot overwrite
+    the new owner's outcome.
+
+    The file must live on storage every replica sees with working POSIX
+    locks (a local disk or a ReadWriteMany volume that supports them). It
+    uses SQLite's rollback journal rather than WAL, whose shared-memory
+    index only works between processes on one host.
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection; SQLite connections must not be shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Runs the block in a write transaction; ``BEGIN IMMEDIATE`` takes the lock up front."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, kind: str, payload: Optional[Dict[str, Any]] = None, idempotency_key: Optional[str] = None,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0.0, requeue_failed: bool = False) -> Job:
+        """Adds a job, or returns the job already queued under ``idempotency_key``.
+
+        With ``requeue_failed`` an existing job that ran out of attempts is
+        reset and tried again instead of being returned as failed.
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            if idempotency_key is not None:
+                row = conn.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None and requeue_failed and row["status"] == FAILED:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ?",
+                        (PENDING, now + delay, now, row["id"]),
+                    )
+                    logging.info("Requeued failed job #%s ('%s').", row["id"], idempotency_key)
+                    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                if row is not None:
+                    logging.info("Job '%s' already queued as #%s (%s).", idempotency_key, row["id"], row["status"])
+                    return Job.from_row(row)
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, idempotency_key, status, max_attempts, available_at,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload or {}, default=str), idempotency_key, PENDING, max_attempts,
+                 now + delay, now, now),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        logging.info("Queued job #%s (%s).", row["id"], kind)
+        return Job.from_row(row)
+
+    def claim(self, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[Job]:
+        """Leases the oldest runnable job to ``worker_id``; expired leases are reclaimed."""
+        now = time.time()
+        kinds = list(kinds) if kinds is not None else None
+        if kinds == []:
+            return None
+        kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})" if kinds else ""
+        with self.transaction() as conn:
+            # A job whose worker keeps dying must not be retried forever.
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', lease_owner = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, RUNNING, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?))"
+                + kind_filter + " ORDER BY available_at, id LIMIT 1",
+                (PENDING, now, RUNNING, now, *(kinds or ())),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["status"] == RUNNING:
+                logging.warning("Lease of job #%s held by '%s' expired; reclaiming.", row["id"], row["lease_owner"])
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?,"
+                " updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return Job.from_row(row)
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extends the lease; False means the job is no longer this worker's."""
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Any = None) -> bool:
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result, default=str), now, job_id, RUNNING, worker_id),
+            )
+        if cursor.rowcount != 1:
+            logging.warning("Job #%s finished on '%s' after losing its lease; result dropped.", job_id, worker_id)
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay: float = 1.0) -> bool:
+        """Records a failed attempt; the job is retried until it runs out of attempts."""
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                               (job_id, RUNNING, worker_id)).fetchone()
+            if row is None:
+                logging.warning("Job #%s failed on '%s' after losing its lease; error dropped.", job_id, worker_id)
+                return False
+            status = FAILED if row["attempts"] >= row["max_attempts"] else PENDING
+            # Back off exponentially between attempts.
+            available_at = now + retry_delay * 2 ** (row["attempts"] - 1)
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE id = ?",
+                (status, error, available_at, now, job_id),
+            )
+        return True
+
+    def get(self, job_id: int) -> Optional[Job]:
+        row = self.connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+
+    def find(self, idempotency_key: str) -> Optional[Job]:
+        row = self.connection().execute("SELECT * FROM jobs WHERE idempotency_key = ?",
+                                         (idempotency_key,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+
+    def wait(self, job_id: int, timeout: Optional[float] = None, poll_interval: float = 0.1) -> Job:
+        """Blocks until the job is done or failed; raises ``TimeoutError`` after ``timeout`` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"Job #{job_id} does not exist")
+            if job.status in TERMINAL:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job #{job_id} still {job.status} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        rows = self.connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def recent(self, limit: int = 50) -> list:
+        rows = self.connection().execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Deletes finished jobs last updated more than ``older_than`` seconds ago, freeing their keys."""
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                                  (*TERMINAL, time.time() - older_than))
+        return cursor.rowcount
+
+
+_queues: Dict[str, JobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(db_path: Path) -> JobQueue:
+    key = str(Path(db_path).resolve())
+    with _queues_lock:
+        if key not in _queues:
+            _queues[key] = JobQueue(db_path)
+        return _queues[key]
@@ -0,0 +1,106 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from jobs.leader import LeaderElection, default_identity
+from jobs.queue import Job, JobQueue
+
+logging.basicConfig(level=logging.INFO)
+
+
+class JobWorker:
+    """Claims jobs from a ``JobQueue`` and runs them with the handler registered for their kind.
+
+    ``handlers`` maps a job kind to ``handler(payload) -> result``. Kinds in
+    ``leader_kinds`` are only claimed while ``leader`` holds leadership, which
+    is how planning work stays on a single replica while the resulting jobs
+    are spread over all of them. A heartbeat thread renews the leases of the
+    jobs in flight.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 concurrency: int = 1, leader: Optional[LeaderElection] = None,
+                 leader_kinds: Iterable[str] = (), worker_id: Optional[str] = None,
+                 poll_interval: float = 0.5):
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.concurrency = max(1, concurrency)
+        self.leader = leader
+        self.leader_kinds = frozenset(leader_kinds)
+        self.worker_id = worker_id or default_identity()
+        self.poll_interval = poll_interval
+        self._active: Dict[int, str] = {}
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def claimable_kinds(self):
+        if self.leader is not None and self.leader.is_leader:
+            return list(self.handlers)
+        return [kind for kind in self.handlers if kind not in self.leader_kinds]
+
+    def run_once(self, worker_id: Optional[str] = None) -> Optional[Job]:
+        """Claims and runs at most one job; returns it, or None when nothing was runnable."""
+        worker_id = worker_id or self.worker_id
+        job = self.queue.claim(worker_id, self.claimable_kinds())
+        if job is None:
+            return None
+        with self._active_lock:
+            self._active[job.id] = worker_id
+        try:
+            logging.info("Running job #%s (%s), attempt %s/%s.", job.id, job.kind, job.attempts, job.max_attempts)
+            result = self.handlers[job.kind](job.payload)
+        except Exception as e:
+            logging.error("Job #%s (%s) failed: %s", job.id, job.kind, e)
+            self.queue.fail(job.id, worker_id, str(e))
+        else:
+            self.queue.complete(job.id, worker_id, result)
+        finally:
+            with self._active_lock:
+                self._active.pop(job.id, None)
+        return job
+
+    def start(self):
+        self._stop.clear()
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._work, args=(f"{self.worker_id}#{index}",),
+                                      name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def _work(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                job = self.run_once(worker_id)
+            except Exception as e:
+                logging.error("Job worker '%s' failed to claim: %s", worker_id, e)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._active_lock:
+                active = list(self._active.items())
+            for job_id, worker_id in active:
+                try:
+                    if not self.queue.heartbeat(job_id, worker_id):
+                        logging.warning("Job #%s is no longer leased to '%s'.", job_id, worker_id)
+                except Exception as e:
+                    logging.error("Heartbeat for job #%s failed: %s", job_id, e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._active_lock:
+            active = len(self._active)
+        return {"worker_id": self.worker_id, "concurrency": self.concurrency, "active": active,
+                "kinds": self.claimable_kinds(), "queue": self.queue.stats()}
+
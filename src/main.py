@@ -1,49 +1,158 @@
-from fastapi import FastAPI, Request
-import uvicorn
-from fastapi.responses import JSONResponse, HTMLResponse
-from reader.yaml_diff import view_yaml_diff_html
-from check.check import check, render_check_html
-from reader.yaml_reader import read_yaml_live
-from reader.yaml_diff import check_yaml_change
-from models.quay_config import QuayConfig
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, Response
+from contextlib import asynccontextmanager
+from health.health import router as health_router
+from models.quay_config import QuayConfig, Organization, ProxyCache
+from services.container import (
+    ServiceConfigurationError, load_env, env_setting, get_async_organization_service,
+    get_async_proxy_cache_service, get_organization_planner,
+)
+from typing import List
+import asyncio
+import json
 import os
 import logging
 from pathlib import Path
 
-app = FastAPI()
+# Route-specific modules (YAML diffing, snapshots, Quay services, the HTTP
+# client) are imported inside their handlers, so a cold start only pays for
+# what the first requests actually use.
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+load_env()
 
 
-YAML_FILE_PATH = Path(os.getenv("YAML_FILE_PATH", Path(__file__).parent / "yaml/test.yaml"))
+YAML_FILE_PATH = Path(env_setting("YAML_FILE_PATH"))
 
 
-YAML_STORAGE_PATH = Path(os.getenv("YAML_STORAGE_PATH", "./storage"))
+YAML_STORAGE_PATH = Path(env_setting("YAML_STORAGE_PATH"))
 if not YAML_STORAGE_PATH.exists():
     YAML_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 
+YAML_WATCH_ENABLED = os.getenv("YAML_WATCH_ENABLED", "true").lower() == "true"
+# The watcher keeps its own snapshot history, so its commits do not use up
+# the changes /yaml/check reports; queued reconciles refer to its revisions.
+YAML_WATCH_STORAGE_PATH = YAML_STORAGE_PATH / "watcher"
+AUTO_RECONCILE = os.getenv("AUTO_RECONCILE", "false").lower() == "true"
+# Run reconciles through the shared job queue in YAML_STORAGE_PATH so that
+# several replicas plan once (on the elected leader) and apply each change once.
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "false").lower() == "true"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+SSE_KEEPALIVE_SECONDS = 15
+NDJSON_CHUNK_LINES = 100
+
+
+def load_config() -> QuayConfig:
+    """Returns the validated YAML config, re-parsed only when the file changed."""
+    from reader.config_cache import get_config_cache
+    return get_config_cache(YAML_FILE_PATH, QuayConfig).get().model
+
+
+def load_config_revision(revision) -> QuayConfig:
+    """Returns the config as committed in snapshot ``revision``, or the current one when it is None."""
+    if revision is None:
+        return load_config()
+    from reader.snapshot_store import get_snapshot_store
+    from reader.yaml_reader import get_type_adapter
+    return get_type_adapter(QuayConfig).validate_python(get_snapshot_store(YAML_WATCH_STORAGE_PATH).load(revision))
+
+
+def reconcile_change(change: dict):
+    """Converges Quay to the YAML file after the watcher reported a change."""
+    config = load_config()
+    planner = get_organization_planner()
+    plan = planner.plan(config)
+    return {"plan": plan.to_dict(), "results": planner.apply(plan)}
+
+
+def start_jobs(app: FastAPI):
+    from jobs.queue import get_job_queue
+    from jobs.leader import LeaderElection
+    from jobs.worker import JobWorker
+    from jobs.handlers import RECONCILE, reconcile_handlers
+
+    queue = get_job_queue(YAML_STORAGE_PATH / "jobs.db")
+    leader = LeaderElection(queue)
+    leader.start()
+    worker = JobWorker(queue, reconcile_handlers(queue, load_config_revision), concurrency=JOB_WORKERS,
+                       leader=leader, leader_kinds=(RECONCILE,))
+    worker.start()
+    app.state.jobs = (queue, leader, worker)
+
+
+def enqueue_reconcile_change(change: dict):
+    """Watcher callback in job-queue mode: queues the reconcile instead of running it here."""
+    from jobs.handlers import enqueue_reconcile
+    queue, _, _ = app.state.jobs
+    return enqueue_reconcile(queue, change).to_dict()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from health.prober import get_health_prober
+    prober = get_health_prober()
+    prober.start()
+    app.state.jobs = None
+    if JOB_QUEUE_ENABLED:
+        start_jobs(app)
+    app.state.yaml_watcher = None
+    if YAML_WATCH_ENABLED and YAML_FILE_PATH.parent.exists():
+        from reader.yaml_watcher import YamlWatcher
+        reconcile = None
+        if AUTO_RECONCILE:
+            reconcile = enqueue_reconcile_change if JOB_QUEUE_ENABLED else reconcile_change
+        watcher = YamlWatcher(YAML_FILE_PATH, YAML_WATCH_STORAGE_PATH, reconcile=reconcile)
+        watcher.start()
+        app.state.yaml_watcher = watcher
+    yield
+    if app.state.yaml_watcher is not None:
+        app.state.yaml_watcher.stop()
+    if app.state.jobs is not None:
+        _, leader, worker = app.state.jobs
+        worker.stop()
+        leader.stop()
+    prober.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(health_router)
+
+
+@app.exception_handler(ServiceConfigurationError)
+async def service_configuration_error(request: Request, e: ServiceConfigurationError):
+    return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+
 @app.get("/")
-def run_check(request: Request):
-    result = check()
+async def run_check(request: Request):
+    """Serves the latest background health probe; never waits on Quay."""
+    from health.prober import get_health_prober
+    result = get_health_prober().result()
     accept = request.headers.get("accept", "")
     if "text/html" in accept:
+        from check.check import render_check_html
         return HTMLResponse(content=render_check_html(result))
     return JSONResponse(content=result)
 
 @app.get("/yaml")
-def get_yaml():
+def get_yaml(request: Request):
     if not YAML_FILE_PATH.exists():
         return JSONResponse(content={"status": "error", "message": f"File '{YAML_FILE_PATH}' does not exist"}, status_code=404)
+    from reader.config_cache import etag_matches, get_config_cache
     try:
-        data = read_yaml_live(YAML_FILE_PATH)
-        validated = QuayConfig(**data)
-        return JSONResponse(content=validated.model_dump())
+        cached = get_config_cache(YAML_FILE_PATH, QuayConfig).get()
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
     except Exception as e:
-        logging.error(f"YAML validation failed: {e}")
+        logging.error("YAML validation failed: %s", e)
         return JSONResponse(content={"status": "error", "message": str(e)}, status_code=400)
 
 
 @app.get("/yaml/check/html")
 def yaml_check_html():
+    from reader.yaml_diff import check_yaml_change, view_yaml_diff_html
     result = check_yaml_change(YAML_STORAGE_PATH, YAML_FILE_PATH)
     return HTMLResponse(content=view_yaml_diff_html(result))
 
@@ -52,13 +161,179 @@ def yaml_check():
     """Checks for YAML file changes and returns a diff if detected."""
     if not YAML_FILE_PATH.exists():
         return JSONResponse(content={"status": "error", "message": "YAML file not found"}, status_code=404)
+    from reader.yaml_diff import check_yaml_change
     try:
         result = check_yaml_change(YAML_STORAGE_PATH, YAML_FILE_PATH)
-        logging.info(f"YAML check result: {result}")
+        logging.info("YAML check result: %s", result)
         return JSONResponse(content=result)
     except Exception as e:
-        logging.error(f"YAML check failed: {e}")
+        logging.error("YAML check failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+@app.get("/yaml/revisions")
+def yaml_revisions():
+    """Lists the stored YAML snapshot revisions, newest last."""
+    from reader.snapshot_store import get_snapshot_store
+    store = get_snapshot_store(YAML_STORAGE_PATH)
+    return JSONResponse(content={"head": store.head().get("revision", 0), "revisions": store.revisions()})
+
+@app.get("/yaml/diff")
+def yaml_diff_revisions(from_rev: int, to_rev: int = 0):
+    """Diffs two stored revisions; ``to_rev`` defaults to the newest one."""
+    from reader.snapshot_store import get_snapshot_store
+    from reader.yaml_diff import diff_yaml
+    store = get_snapshot_store(YAML_STORAGE_PATH)
+    try:
+        to_rev = to_rev or store.head().get("revision", 0)
+        diffs = diff_yaml(store.load(from_rev), store.load(to_rev))
+        return JSONResponse(content={"from_rev": from_rev, "to_rev": to_rev, "diff": diffs})
+    except KeyError as e:
+        return JSONResponse(content={"status": "error", "message": str(e.args[0])}, status_code=404)
+
+@app.get("/yaml/events")
+async def yaml_events(request: Request):
+    """Streams file-change diffs and reconcile results as server-sent events."""
+    watcher = request.app.state.yaml_watcher
+    if watcher is None:
+        return JSONResponse(content={"status": "error", "message": "YAML watcher is disabled"}, status_code=503)
+    subscriber = watcher.broadcaster.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            watcher.broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/yaml/plan")
+def yaml_plan(prune: bool = False, stream: bool = False, planner=Depends(get_organization_planner)):
+    """Diffs the YAML config against live Quay state and returns the plan without applying it.
+
+    With ``stream=true`` organizations are read one at a time, which keeps
+    memory flat for very large configs.
+    """
+    if not YAML_FILE_PATH.exists():
+        return JSONResponse(content={"status": "error", "message": "YAML file not found"}, status_code=404)
+    from reader.yaml_stream import iter_organizations, YamlStreamError
+    try:
+        desired = iter_organizations(YAML_FILE_PATH) if stream else load_config()
+        plan = planner.plan(desired, prune=prune)
+        return JSONResponse(content=plan.to_dict())
+    except YamlStreamError as e:
+        logging.error("YAML plan failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e), "line": e.line}, status_code=400)
+    except Exception as e:
+        logging.error("YAML plan failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+@app.post("/yaml/apply")
+async def yaml_apply(prune: bool = False, service=Depends(get_async_organization_service)):
+    """Plans against live Quay state and applies only the resulting changes."""
+    if not YAML_FILE_PATH.exists():
+        return JSONResponse(content={"status": "error", "message": "YAML file not found"}, status_code=404)
+    from services.organization_planner import build_plan, apply_plan_async
+    try:
+        config = load_config()
+        live = (await service.list_organizations()).get("organizations", [])
+        plan = build_plan(config, live, prune=prune)
+        results = await apply_plan_async(plan, service)
+        return JSONResponse(content={"plan": plan.to_dict(), "results": results})
+    except Exception as e:
+        logging.error("YAML apply failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+@app.get("/jobs")
+def jobs_status(limit: int = 20):
+    """Reports leadership, this replica's worker and the most recent jobs."""
+    if app.state.jobs is None:
+        return JSONResponse(content={"status": "error", "message": "Job queue is disabled"}, status_code=503)
+    queue, leader, worker = app.state.jobs
+    return JSONResponse(content={"leader": leader.state(), "worker": worker.stats(),
+                                 "recent": [job.to_dict() for job in queue.recent(limit)]})
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: int):
+    if app.state.jobs is None:
+        return JSONResponse(content={"status": "error", "message": "Job queue is disabled"}, status_code=503)
+    job = app.state.jobs[0].get(job_id)
+    if job is None:
+        return JSONResponse(content={"status": "error", "message": f"Job #{job_id} not found"}, status_code=404)
+    return JSONResponse(content=job.to_dict())
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of request, pipeline, YAML, cache and pool metrics."""
+    from metrics.registry import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Returns hit/miss/eviction counters of the API response caches."""
+    from api.client import cache_stats
+    return JSONResponse(content=cache_stats())
+
+@app.get("/organizations")
+async def list_organizations_ndjson(prefix: str = "", service=Depends(get_async_organization_service)):
+    """Streams organizations as NDJSON, one object per line, optionally filtered by name prefix.
+
+    Pages are fetched from Quay while earlier ones are written out, so memory
+    stays at about two pages however many organizations exist.
+    """
+    organizations = service.iter_organizations(prefix or None)
+    try:
+        first = await organizations.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        logging.error("Listing organizations failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+    async def stream():
+        if first is None:
+            return
+        lines = [json.dumps(first)]
+        async for org in organizations:
+            lines.append(json.dumps(org))
+            if len(lines) >= NDJSON_CHUNK_LINES:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/organizations/bulk")
+async def create_organizations_bulk(organizations: List[Organization],
+                                    service=Depends(get_async_organization_service)):
+    """Creates the given organizations concurrently and returns one result per entry."""
+    try:
+        results = await service.create_organizations_from_list([org.model_dump() for org in organizations])
+        return JSONResponse(content=results)
+    except Exception as e:
+        logging.error("Bulk organization creation failed: %s", e)
+        return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
+
+@app.post("/proxy-caches/bulk")
+async def ensure_proxy_caches_bulk(proxy_caches: List[ProxyCache], rotate_credentials: bool = False,
+                                   service=Depends(get_async_proxy_cache_service)):
+    """Creates or updates proxy caches, skipping identical ones, and returns a per-org result matrix."""
+    try:
+        results = await service.ensure_proxy_caches(proxy_caches, rotate_credentials=rotate_credentials)
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        return JSONResponse(content={"summary": summary, "results": results})
+    except Exception as e:
+        logging.error("Bulk proxy cache provisioning failed: %s", e)
         return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,8 +1,17 @@
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import List, Optional
 
 class Organization(BaseModel):
     name: str
+    email: Optional[str] = None
+
+class ProxyCache(BaseModel):
+    org_name: str
+    upstream_registry: str = "docker.io"
+    expiration_s: int = 86400
+    insecure: bool = False
+    upstream_registry_username: Optional[str] = None
+    upstream_registry_password: Optional[str] = None
 
 class QuayConfig(BaseModel):
     organizations: List[Organization]
\ No newline at end of file
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import yaml
+
+import actions
+from actions import JOB_REGISTRY
+from pipeline.scheduler import expand_steps, topological_order, FAIL_FAST, PipelineError
+from pipeline.templates import compile_template
+
+logging.basicConfig(level=logging.INFO)
+
+# Bump whenever the on-disk plan format or the expansion semantics change.
+COMPILER_VERSION = 1
+DEFAULT_MAX_WORKERS = 4
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    id: str
+    name: str
+    job: str
+    action: Callable[..., Any]
+    params: Mapping[str, Any]
+    needs: Tuple[str, ...]
+
+    def run(self):
+        return self.action(**self.params)
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    key: str
+    steps: Tuple[CompiledStep, ...]
+    max_workers: int
+    on_error: str
+
+
+def resolve_action(job: str) -> Callable[..., Any]:
+    """Binds a job name from ``JOB_REGISTRY`` to its function in ``actions``."""
+    action = JOB_REGISTRY.get(job)
+    if not action:
+        def unknown(**params):
+            print(f"❌ Unknown job: '{job}'. Allowed: {list(JOB_REGISTRY.keys())}")
+        return unknown
+
+    func = getattr(actions, action, None)
+    if func is None:
+        def missing(**params):
+            raise PipelineError(f"Action '{action}' for job '{job}' is not implemented in actions.py")
+        return missing
+    return func
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _bind(spec: Dict[str, Any], key: str) -> CompiledPlan:
+    steps = tuple(
+        CompiledStep(
+            id=step["id"],
+            name=step["name"],
+            job=step["job"],
+            action=resolve_action(step["job"]),
+            params=MappingProxyType(step["params"] if isinstance(step["params"], dict) else {}),
+            needs=tuple(step["needs"]),
+        )
+        for step in spec["steps"]
+    )
+    return CompiledPlan(key, steps, spec["max_workers"], spec["on_error"])
+
+
+def _compile_spec(struct: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    templates: Dict[int, Callable[[Dict[str, Any]], Any]] = {}
+
+    def resolve(value, extra):
+        # expand_steps passes the same params object for every foreach item,
+        # so each template is parsed once and only rendered per item.
+        template = templates.get(id(value))
+        if template is None:
+            template = templates[id(value)] = compile_template(value)
+        return template({"inputs": inputs, **extra})
+
+    steps = expand_steps(struct.get("pipeline", []), resolve)
+    topological_order(steps)
+    return {
+        "steps": [
+            {"id": s.id, "name": s.name, "job": s.job, "params": s.params, "needs": s.needs}
+            for s in steps
+        ],
+        "max_workers": struct.get("max_workers", DEFAULT_MAX_WORKERS),
+        "on_error": struct.get("on_error", FAIL_FAST),
+    }
+
+
+class PlanCompiler:
+    """Compiles struct files into immutable plans, cached in memory and on disk.
+
+    The disk entry for a struct file is keyed by the hash of its bytes and
+    records the hash of the inputs file it was compiled against, so a cache
+    hit costs two file hashes and one small JSON read, with no YAML parsing.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        if cache_dir is None:
+            cache_dir = Path(os.getenv("YAML_STORAGE_PATH", "./storage")) / "plans"
+        self.cache_dir = Path(cache_dir)
+        self._memory: Dict[str, CompiledPlan] = {}
+        self._inputs_by_struct: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, struct_file) -> CompiledPlan:
+        struct_file = Path(struct_file)
+        struct_hash = _hash_file(struct_file)
+        cache_file = self.cache_dir / f"{struct_hash}.json"
+
+        cached = None
+        inputs_file = self._inputs_by_struct.get(struct_hash)
+        if inputs_file is None:
+            cached = self._read_cache(cache_file)
+            inputs_file = Path(cached["input_file"]) if cached else None
+        if inputs_file is not None and inputs_file.exists():
+            key = f"{COMPILER_VERSION}:{struct_hash}:{_hash_file(inputs_file)}"
+            plan = self._memory.get(key)
+            if plan is not None:
+                return plan
+            if cached is None:
+                cached = self._read_cache(cache_file)
+            if cached is not None and cached.get("key") == key:
+                return self._remember(struct_hash, inputs_file, _bind(cached["plan"], key))
+
+        with open(struct_file, "rb") as f:
+            struct = yaml.load(f, Loader=SafeLoader)
+        inputs_file = Path(struct["input_file"])
+        with open(inputs_file, "rb") as f:
+            inputs = yaml.load(f, Loader=SafeLoader) or {}
+
+        key = f"{COMPILER_VERSION}:{struct_hash}:{_hash_file(inputs_file)}"
+        spec = _compile_spec(struct, inputs)
+        plan = self._remember(struct_hash, inputs_file, _bind(spec, key))
+        self._write_cache(cache_file, {"key": key, "input_file": str(inputs_file), "plan": spec})
+        return plan
+
+    def _remember(self, struct_hash: str, inputs_file: Path, plan: CompiledPlan) -> CompiledPlan:
+        with self._lock:
+            self._inputs_by_struct[struct_hash] = inputs_file
+            self._memory[plan.key] = plan
+        return plan
+
+    def _read_cache(self, cache_file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, cache_file: Path, entry: Dict[str, Any]):
+        # A cache hit must bind exactly what a cold compile does; params with
+        # non-string keys or dates would come back changed from JSON.
+        try:
+            payload = json.dumps(entry)
+        except (TypeError, ValueError) as e:
+            logging.warning("Compiled plan is not JSON serialisable, skipping disk cache: %s", e)
+            payload = None
+        if payload is not None and json.loads(payload) != entry:
+            logging.info("Compiled plan does not round-trip through JSON, skipping disk cache.")
+            payload = None
+        try:
+            if payload is None:
+                # An entry left by an older version must not be hit either.
+                cache_file.unlink(missing_ok=True)
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logging.warning("Could not write compiled plan cache '%s': %s", cache_file, e)
+
+
+_compiler: Optional[PlanCompiler] = None
+
+
+def compile_pipeline(struct_file) -> CompiledPlan:
+    global _compiler
+    if _compiler is None:
+        _compiler = PlanCompiler()
+    return _compiler.compile(struct_file)
+
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from pipeline.scheduler import topological_order
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+
+# Rewrite the journal once it holds this many records per tracked step.
+COMPACT_FACTOR = 10
+
+
+def step_input_hashes(steps: Iterable[Any]) -> Dict[str, str]:
+    """Hashes each step's job and params together with the hashes of its dependencies.
+
+    Chaining the dependency hashes means a changed step also invalidates
+    everything downstream of it.
+    """
+    hashes: Dict[str, str] = {}
+    for step in topological_order(list(steps)):
+        payload = json.dumps(
+            {
+                "job": step.job,
+                "params": dict(step.params),
+                "needs": sorted(hashes[dep] for dep in step.needs),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        hashes[step.id] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return hashes
+
+
+class StepJournal:
+    """Append-only JSON-lines log of step outcomes for one pipeline."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_struct(cls, struct_file, storage_dir: Optional[Path] = None) -> "StepJournal":
+        if storage_dir is None:
+            storage_dir = Path(os.getenv("YAML_STORAGE_PATH", "./storage"))
+        return cls(Path(storage_dir) / "journal" / f"{Path(struct_file).stem}.jsonl")
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the latest record per step id."""
+        latest, count = self._read()
+        if latest and count > COMPACT_FACTOR * len(latest):
+            # Re-read under the lock so records appended meanwhile are kept.
+            with self._locked():
+                latest, count = self._read()
+                if latest and count > COMPACT_FACTOR * len(latest):
+                    self._compact(latest.values())
+        return latest
+
+    def record(self, step_id: str, input_hash: str, status: str, duration: float = 0.0,
+               error: Optional[str] = None):
+        line = json.dumps({
+            "step": step_id,
+            "input_hash": input_hash,
+            "status": status,
+            "duration": round(duration, 6),
+            "error": error,
+            "ts": time.time(),
+        }) + "\n"
+        with self._locked():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    @contextmanager
+    def _locked(self):
+        """Serialises appends and compaction across threads and processes."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_name(f"{self.path.name}.lock"), "a+") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        latest: Dict[str, Dict[str, Any]] = {}
+        count = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    count += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crashed run; ignore it.
+                        continue
+                    latest[record["step"]] = record
+        except FileNotFoundError:
+            pass
+        return latest, count
+
+    def _compact(self, records):
+        """Rewrites the journal with one record per step; call while holding ``_locked()``."""
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.path)
+        logging.info("Compacted pipeline journal '%s'.", self.path)
@@ -0,0 +1,213 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+FAIL_FAST = "fail-fast"
+CONTINUE_ON_ERROR = "continue"
+POLICIES = (FAIL_FAST, CONTINUE_ON_ERROR)
+
+
+class PipelineError(Exception):
+    pass
+
+
+@dataclass
+class Step:
+    id: str
+    name: str
+    job: str
+    params: Any = field(default_factory=dict)
+    needs: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StepResult:
+    status: str
+    started: float = 0.0
+    duration: float = 0.0
+    error: Optional[str] = None
+    result: Any = None
+
+
+def expand_steps(pipeline: List[Dict[str, Any]], resolve: Callable[[Any, Dict[str, Any]], Any]) -> List[Step]:
+    """Turns the ``pipeline`` section of a struct file into concrete steps.
+
+    ``resolve(value, extra)`` resolves placeholders; ``extra`` carries the
+    ``item``/``index`` of a ``foreach`` expansion. A step without ``needs``
+    depends on the previous enabled step, so legacy pipelines keep running in
+    order; ``needs: []`` marks a step that can start immediately. Needing a
+    disabled step means needing whatever that step would have needed.
+    """
+    enabled = [step for step in pipeline if step.get("enabled", False)]
+
+    # What each named disabled step would have waited for, so steps that
+    # need it inherit those dependencies instead of losing them.
+    disabled: Dict[str, List[str]] = {}
+    previous, index = None, 0
+    for spec in pipeline:
+        if spec.get("enabled", False):
+            previous = spec.get("name") or f"step-{index}"
+            index += 1
+        elif spec.get("name"):
+            disabled[spec["name"]] = _needs_of(spec, previous)
+
+    # First pass: name every step and expand foreach lists, so that needs may
+    # reference steps declared further down the file.
+    expanded = []
+    instances: Dict[str, List[str]] = {}
+    for index, spec in enumerate(enabled):
+        name = spec.get("name") or f"step-{index}"
+        if name in instances:
+            raise PipelineError(f"Duplicate step name '{name}'")
+        if "foreach" in spec:
+            items = resolve(spec["foreach"], {})
+            if not isinstance(items, list):
+                raise PipelineError(f"foreach of step '{name}' must resolve to a list, got {type(items).__name__}")
+            contexts = [(f"{name}[{i}]", {"item": item, "index": i}) for i, item in enumerate(items)]
+        else:
+            contexts = [(name, {})]
+        instances[name] = [step_id for step_id, _ in contexts]
+        expanded.append((name, spec, contexts))
+
+    steps: List[Step] = []
+    previous = None
+    for name, spec, contexts in expanded:
+        dependencies: List[str] = []
+        pending = list(reversed(_needs_of(spec, previous)))
+        bypassed = set()
+        while pending:
+            dep = pending.pop()
+            if dep in instances:
+                dependencies.extend(step_id for step_id in instances[dep] if step_id not in dependencies)
+            elif dep in disabled:
+                if dep not in bypassed:
+                    bypassed.add(dep)
+                    pending.extend(reversed(disabled[dep]))
+            else:
+                raise PipelineError(f"Step '{name}' needs unknown step '{dep}'")
+
+        params = spec.get("params", {})
+        for step_id, extra in contexts:
+            steps.append(Step(step_id, name, spec.get("job"), resolve(params, extra), list(dependencies)))
+        previous = name
+
+    return steps
+
+
+def _needs_of(spec: Dict[str, Any], previous: Optional[str]) -> List[str]:
+    if "needs" in spec:
+        needs = spec.get("needs") or []
+        return [needs] if isinstance(needs, str) else list(needs)
+    return [previous] if previous else []
+
+
+def topological_order(steps: List[Step]) -> List[Step]:
+    """Kahn's algorithm; raises on cycles."""
+    by_id = {step.id: step for step in steps}
+    indegree = {step.id: len(step.needs) for step in steps}
+    dependents: Dict[str, List[str]] = {step.id: [] for step in steps}
+    for step in steps:
+        for dep in step.needs:
+            dependents[dep].append(step.id)
+
+    ready = [step.id for step in steps if indegree[step.id] == 0]
+    order = []
+    while ready:
+        step_id = ready.pop()
+        order.append(by_id[step_id])
+        for child in dependents[step_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+
+    if len(order) != len(steps):
+        cyclic = sorted(step_id for step_id, degree in indegree.items() if degree > 0)
+        raise PipelineError(f"Dependency cycle between steps: {cyclic}")
+    return order
+
+
+def run_dag(steps: List[Step], execute: Callable[[Step], Any], max_workers: int = 4,
+            policy: str = FAIL_FAST) -> Dict[str, StepResult]:
+    """Runs steps on a bounded pool as soon as their dependencies succeed."""
+    if policy not in POLICIES:
+        raise PipelineError(f"Unknown error policy '{policy}', expected one of {POLICIES}")
+    topological_order(steps)
+
+    by_id = {step.id: step for step in steps}
+    remaining = {step.id: set(step.needs) for step in steps}
+    dependents: Dict[str, List[str]] = {step.id: [] for step in steps}
+    for step in steps:
+        for dep in step.needs:
+            dependents[dep].append(step.id)
+
+    results: Dict[str, StepResult] = {}
+    ready = [step.id for step in steps if not remaining[step.id]]
+    running = {}
+    aborted = False
+
+    def skip_dependents(step_id):
+        pending = [(child, step_id) for child in dependents[step_id]]
+        while pending:
+            child, cause = pending.pop()
+            if child in results:
+                continue
+            results[child] = StepResult("skipped", error=f"dependency '{cause}' did not succeed")
+            pending.extend((grandchild, child) for grandchild in dependents[child])
+
+    def timed(step):
+        started = time.monotonic()
+        try:
+            result = execute(step)
+        except Exception as e:
+            return StepResult("failed", started, time.monotonic() - started, error=str(e))
+        return StepResult("succeeded", started, time.monotonic() - started, result=result)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pipeline") as pool:
+        while ready or running:
+            while ready and not aborted:
+                step_id = ready.pop(0)
+                if step_id not in results:
+                    running[pool.submit(timed, by_id[step_id])] = step_id
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                result = future.result()
+                results[step_id] = result
+                if result.status != "succeeded":
+                    if policy == FAIL_FAST:
+                        aborted = True
+                    skip_dependents(step_id)
+                    continue
+                for child in dependents[step_id]:
+                    remaining[child].discard(step_id)
+                    if not remaining[child] and child not in results:
+                        ready.append(child)
+
+    for step in steps:
+        if step.id not in results:
+            results[step.id] = StepResult("skipped", error="pipeline aborted")
+    return results
+
+
+def critical_path(steps: List[Step], results: Dict[str, StepResult]):
+    """Returns the chain of steps with the largest summed duration and that duration."""
+    finish: Dict[str, float] = {}
+    parent: Dict[str, Optional[str]] = {}
+    for step in topological_order(steps):
+        best = max(step.needs, key=lambda dep: finish[dep], default=None)
+        parent[step.id] = best
+        finish[step.id] = results[step.id].duration + (finish[best] if best else 0.0)
+
+    if not finish:
+        return [], 0.0
+    tail = max(finish, key=finish.get)
+    path = []
+    node = tail
+    while node:
+        path.append(node)
+        node = parent[node]
+    return list(reversed(path)), finish[tail]
@@ -0,0 +1,77 @@
+import re
+from typing import Any, Callable, Dict
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][\w.]*)\s*\}\}")
+
+Template = Callable[[Dict[str, Any]], Any]
+
+
+def _lookup(context: Dict[str, Any], path: str) -> Any:
+    value: Any = context
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, "")
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return ""
+    return value
+
+
+def _constant(value: Any) -> Template:
+    return lambda context: value
+
+
+def _reference(path: str) -> Template:
+    return lambda context: _lookup(context, path)
+
+
+def _interpolation(parts) -> Template:
+    def render(context):
+        return "".join(part if is_literal else str(_lookup(context, part)) for is_literal, part in parts)
+    return render
+
+
+def compile_template(value: Any) -> Template:
+    """Parses placeholders once and returns a closure that renders ``value`` for a context.
+
+    A string that is exactly one ``{{ scope.path }}`` keeps the referenced value
+    as-is (lists stay lists); inline or multiple placeholders are rendered into
+    a string. Subtrees without placeholders render to the original object.
+    """
+    return _compile(value)[0]
+
+
+def _compile(value: Any):
+    """Returns ``(template, is_constant)``."""
+    if isinstance(value, str):
+        matches = list(PLACEHOLDER.finditer(value)) if "{{" in value else []
+        if not matches:
+            return _constant(value), True
+        if len(matches) == 1 and matches[0].group(0) == value.strip():
+            return _reference(matches[0].group(1)), False
+        parts, position = [], 0
+        for match in matches:
+            if match.start() > position:
+                parts.append((True, value[position:match.start()]))
+            parts.append((False, match.group(1)))
+            position = match.end()
+        if position < len(value):
+            parts.append((True, value[position:]))
+        return _interpolation(tuple(parts)), False
+
+    if isinstance(value, dict):
+        compiled = {key: _compile(item) for key, item in value.items()}
+        if all(constant for _, constant in compiled.values()):
+            return _constant(value), True
+        renderers = {key: render for key, (render, _) in compiled.items()}
+        return (lambda context: {key: render(context) for key, render in renderers.items()}), False
+
+    if isinstance(value, list):
+        compiled = [_compile(item) for item in value]
+        if all(constant for _, constant in compiled):
+            return _constant(value), True
+        renderers = [render for render, _ in compiled]
+        return (lambda context: [render(context) for render in renderers]), False
+
+    return _constant(value), True
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Generic, Optional, Type, TypeVar
+
+from reader.yaml_diff import get_yaml_hash
+from reader.yaml_ops import file_fingerprint, is_fingerprint_settled
+from reader.yaml_reader import read_yaml_as
+
+logging.basicConfig(level=logging.INFO)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CachedConfig(Generic[T]):
+    model: T
+    body: bytes
+    etag: str
+
+
+class ParsedConfigCache(Generic[T]):
+    """Keeps the validated model of one YAML file and its serialised JSON.
+
+    Entries are keyed by the file's stat fingerprint, so a hit costs one
+    ``stat``. A fingerprint still inside the mtime settle window is backed up
+    by a hash of the raw bytes, which catches same-tick rewrites. Validation
+    errors are cached too, so a broken file is not re-parsed on every hit.
+    """
+
+    def __init__(self, file_path: Path, model: Type[T]):
+        self.file_path = Path(file_path)
+        self.model = model
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[Dict[str, Any]] = None
+        self._raw_hash: Optional[str] = None
+        self._entry: Optional[CachedConfig[T]] = None
+        self._error: Optional[Exception] = None
+
+    def get(self) -> CachedConfig[T]:
+        fingerprint = file_fingerprint(self.file_path)
+        with self._lock:
+            # Only settled fingerprints are ever stored, so a match is trustworthy.
+            if fingerprint == self._fingerprint:
+                return self._result()
+            raw_hash = get_yaml_hash(self.file_path)
+            if raw_hash != self._raw_hash:
+                self._load(raw_hash)
+            # A fingerprint inside the settle window can still hide a same-tick,
+            # same-size rewrite; keep hashing until it has settled.
+            self._fingerprint = fingerprint if is_fingerprint_settled(fingerprint) else None
+            return self._result()
+
+    def invalidate(self):
+        with self._lock:
+            self._fingerprint = None
+            self._raw_hash = None
+
+    def _load(self, raw_hash: str):
+        self._raw_hash = raw_hash
+        try:
+            model = read_yaml_as(self.file_path, self.model)
+        except Exception as e:
+            self._entry, self._error = None, e
+            return
+        body = model.model_dump_json().encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self._entry, self._error = CachedConfig(model, body, etag), None
+        logging.info("Parsed config cache refreshed from '%s' (%s bytes).", self.file_path, len(body))
+
+    def _result(self) -> CachedConfig[T]:
+        if self._error is not None:
+            raise self._error
+        return self._entry
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match list, as RFC 9110 requires for GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+_caches: Dict[tuple, ParsedConfigCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_config_cache(file_path: Path, model: Type[T]) -> ParsedConfigCache[T]:
+    key = (str(Path(file_path).resolve()), model)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ParsedConfigCache(file_path, model)
+        return _caches[key]
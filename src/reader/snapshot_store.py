@@ -0,0 +1,288 @@
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+from reader.yaml_ops import list_match_key
+from reader.yaml_reader import SafeDumper, SafeLoader
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+DEFAULT_HISTORY = int(os.getenv("SNAPSHOT_HISTORY", "20"))
+KEYFRAME_INTERVAL = 10
+_UNCHANGED = object()
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    """msgpack (or JSON) when it round-trips exactly, YAML otherwise.
+
+    Snapshots hold whatever the YAML loader produced, so non-string keys,
+    dates or sets must survive too; the safe YAML dumper represents
+    everything the safe loader can return.
+    """
+    try:
+        if msgpack is not None:
+            blob = b"M" + zlib.compress(msgpack.packb(payload, use_bin_type=True))
+        else:
+            blob = b"J" + zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        if _decode(blob) == payload:
+            return blob
+    except (TypeError, ValueError):
+        pass
+    return b"Y" + zlib.compress(yaml.dump(payload, Dumper=SafeDumper, sort_keys=False).encode("utf-8"))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    kind, body = blob[:1], zlib.decompress(blob[1:])
+    if kind == b"M":
+        if msgpack is None:
+            raise RuntimeError("Snapshot was written with msgpack, which is not installed")
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    if kind == b"Y":
+        return yaml.load(body, Loader=SafeLoader)
+    return json.loads(body)
+
+
+def make_delta(old: Any, new: Any) -> Any:
+    """Returns a structural delta turning ``old`` into ``new``, or ``_UNCHANGED``.
+
+    Mappings and name-keyed lists are diffed recursively; anything else is
+    replaced wholesale. Keys are stored as pairs so non-string keys survive
+    JSON encoding.
+    """
+    if old == new:
+        return _UNCHANGED
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed, sub = [], []
+        for key, value in new.items():
+            if key not in old:
+                changed.append([key, value])
+                continue
+            delta = make_delta(old[key], value)
+            if delta is not _UNCHANGED:
+                sub.append([key, delta])
+        removed = [key for key in old if key not in new]
+        return {"d": {"set": changed, "del": removed, "sub": sub, "order": list(new)}}
+    if isinstance(old, list) and isinstance(new, list):
+        key = list_match_key(old, new)
+        if key is not None:
+            old_by_key = {item[key]: item for item in old}
+            changed, sub = [], []
+            for item in new:
+                previous = old_by_key.get(item[key])
+                if previous is None:
+                    changed.append(item)
+                    continue
+                delta = make_delta(previous, item)
+                if delta is not _UNCHANGED:
+                    sub.append([item[key], delta])
+            return {"l": {"key": key, "order": [item[key] for item in new], "set": changed, "sub": sub}}
+    return {"v": new}
+
+
+def apply_delta(old: Any, delta: Any) -> Any:
+    if "v" in delta:
+        return delta["v"]
+    if "d" in delta:
+        spec = delta["d"]
+        removed = set(spec["del"])
+        values = {key: value for key, value in old.items() if key not in removed}
+        values.update({key: value for key, value in spec["set"]})
+        for key, child in spec["sub"]:
+            values[key] = apply_delta(old[key], child)
+        return {key: values[key] for key in spec["order"]}
+    spec = delta["l"]
+    key = spec["key"]
+    items = {item[key]: item for item in old}
+    items.update({item[key]: item for item in spec["set"]})
+    for name, child in spec["sub"]:
+        items[name] = apply_delta(items[name], child)
+    return [items[name] for name in spec["order"]]
+
+
+class SnapshotStore:
+    """Versioned, compressed YAML snapshots with atomic commits.
+
+    Every commit writes ``rev-NNNNNN.bin`` (zlib-compressed msgpack, or JSON
+    when msgpack is unavailable, and YAML for data neither represents
+    exactly), then atomically replaces ``HEAD.json``, all
+    under an exclusive file lock. Most revisions store a structural delta
+    against their parent, with a full keyframe every ``KEYFRAME_INTERVAL``
+    revisions. Only the newest ``history`` revisions are kept.
+    """
+
+    def __init__(self, storage_dir: Path, history: int = DEFAULT_HISTORY):
+        self.storage_dir = Path(storage_dir)
+        self.root = self.storage_dir / "snapshots"
+        self.history = max(1, history)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._cache: Dict[int, Any] = {}
+
+    @contextmanager
+    def lock(self):
+        """Serialises readers and writers across threads and processes."""
+        with self._thread_lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / ".lock", "a+") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                self._depth = 1
+                try:
+                    yield
+                finally:
+                    self._depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def head(self) -> Dict[str, Any]:
+        return self._read_head() or self._migrate_legacy()
+
+    def _read_head(self) -> Dict[str, Any]:
+        try:
+            with open(self.root / "HEAD.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def revisions(self) -> List[Dict[str, Any]]:
+        return self.head().get("revisions", [])
+
+    def latest(self) -> Tuple[int, Any]:
+        with self.lock():
+            revision = self.head().get("revision", 0)
+            return revision, (self.load(revision) if revision else {})
+
+    def load(self, revision: int) -> Any:
+        """Rebuilds ``revision`` from its nearest keyframe; raises ``KeyError`` if it was pruned."""
+        with self.lock():
+            if revision in self._cache:
+                return self._cache[revision]
+            chain = []
+            current = revision
+            while current not in self._cache:
+                try:
+                    record = self._read(current)
+                except FileNotFoundError:
+                    raise KeyError(f"Snapshot revision {revision} does not exist") from None
+                chain.append((current, record))
+                if "base" in record:
+                    break
+                current = record["parent"]
+            data = None if "base" in chain[-1][1] else self._cache[current]
+            for number, record in reversed(chain):
+                data = record["base"] if "base" in record else apply_delta(data, record["delta"])
+                self._remember(number, data)
+            return data
+
+    def commit(self, data: Any, content_hash: str) -> int:
+        """Stores ``data`` as the next revision; call while holding ``lock()``."""
+        head = self._read_head()
+        parent = head.get("revision", 0)
+        revision = parent + 1
+        revisions = head.get("revisions", [])
+
+        record: Dict[str, Any] = {"base": data}
+        if parent and revision % KEYFRAME_INTERVAL != 0:
+            delta = make_delta(self.load(parent), data)
+            record = {"parent": parent, "delta": {"v": data} if delta is _UNCHANGED else delta}
+        blob = _encode(record)
+        self._write_atomic(self._revision_path(revision), blob)
+
+        revisions = revisions + [{"revision": revision, "hash": content_hash, "ts": time.time(), "size": len(blob)}]
+        dropped, revisions = revisions[:-self.history], revisions[-self.history:]
+        if dropped:
+            self._rebase(revisions[0]["revision"])
+
+        self._write_atomic(self.root / "HEAD.json", json.dumps(
+            {"revision": revision, "hash": content_hash, "revisions": revisions}
+        ).encode("utf-8"))
+        self._remember(revision, data)
+        for entry in dropped:
+            self._revision_path(entry["revision"]).unlink(missing_ok=True)
+        return revision
+
+    def update_hash(self, content_hash: str):
+        """Records new file bytes whose parsed content equals the current revision."""
+        head = self._read_head()
+        if not head:
+            return
+        head["hash"] = content_hash
+        head["revisions"][-1]["hash"] = content_hash
+        self._write_atomic(self.root / "HEAD.json", json.dumps(head).encode("utf-8"))
+
+    def _rebase(self, revision: int):
+        """Rewrites ``revision`` as a keyframe so older revisions can be dropped."""
+        record = self._read(revision)
+        if "base" not in record:
+            self._write_atomic(self._revision_path(revision), _encode({"base": self.load(revision)}))
+
+    def _remember(self, revision: int, data: Any):
+        self._cache[revision] = data
+        for stale in sorted(self._cache)[:-2]:
+            del self._cache[stale]
+
+    def _revision_path(self, revision: int) -> Path:
+        return self.root / f"rev-{revision:06d}.bin"
+
+    def _read(self, revision: int) -> Dict[str, Any]:
+        with open(self._revision_path(revision), "rb") as f:
+            return _decode(f.read())
+
+    def _write_atomic(self, path: Path, blob: bytes):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _migrate_legacy(self) -> Dict[str, Any]:
+        """Imports ``last_yaml_snapshot.yaml``/``last_hash.txt`` written by older versions."""
+        legacy_snapshot = self.storage_dir / "last_yaml_snapshot.yaml"
+        legacy_hash = self.storage_dir / "last_hash.txt"
+        if not legacy_snapshot.exists():
+            return {}
+        with open(legacy_snapshot, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=SafeLoader) or {}
+        content_hash = legacy_hash.read_text(encoding="utf-8").strip() if legacy_hash.exists() else ""
+        with self.lock():
+            if not self._read_head():
+                self.commit(data, content_hash)
+            legacy_snapshot.unlink(missing_ok=True)
+            legacy_hash.unlink(missing_ok=True)
+        return self._read_head()
+
+
+_stores: Dict[str, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(storage_dir: Path) -> SnapshotStore:
+    key = str(Path(storage_dir).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SnapshotStore(storage_dir)
+        return _stores[key]
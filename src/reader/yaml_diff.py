@@ -1,59 +1,178 @@
 import hashlib
 import yaml
-from reader.yaml_ops import load_yaml_hash, save_yaml_hash
-from typing import Union, Dict, Any, Optional
+from reader.snapshot_store import get_snapshot_store
+from reader.yaml_ops import (
+    file_fingerprint, is_fingerprint_settled, load_fingerprint, save_fingerprint, list_match_key,
+)
+from reader.yaml_reader import read_yaml, YAML_SECONDS
+from typing import Union, Dict, Any, List, Optional
 from pathlib import Path
 
 
+HASH_CHUNK_SIZE = 1 << 20
+
+_fingerprints: Dict[tuple, Dict[str, Any]] = {}
+
+HASH_SECONDS = YAML_SECONDS.labels("hash")
+DIFF_SECONDS = YAML_SECONDS.labels("diff")
+
+
 def get_yaml_hash(source: Union[str, Path, Dict[str, Any]]) -> str:
-    if isinstance(source, (str, Path)):
-        with open(source, "rb") as f:
-            content = f.read()
-    else:
-        content = yaml.safe_dump(source).encode("utf-8")
-    return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    with HASH_SECONDS.time():
+        if isinstance(source, (str, Path)):
+            with open(source, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        else:
+            digest.update(yaml.safe_dump(source).encode("utf-8"))
+    return digest.hexdigest()
 
 
 def has_yaml_changed(new_hash: str, old_hash: str) -> bool:
     return new_hash != old_hash
 
 
+def _pointer_token(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _subtree_hash(value: Any, memo: Dict[int, int]) -> int:
+    """Hashes a parsed YAML subtree bottom-up; each container is hashed once per diff."""
+    if isinstance(value, dict):
+        cached = memo.get(id(value))
+        if cached is None:
+            cached = memo[id(value)] = hash(frozenset(
+                (key, _subtree_hash(item, memo)) for key, item in value.items()
+            ))
+        return cached
+    if isinstance(value, list):
+        cached = memo.get(id(value))
+        if cached is None:
+            cached = memo[id(value)] = hash(tuple(_subtree_hash(item, memo) for item in value))
+        return cached
+    try:
+        return hash(value)
+    except TypeError:
+        return hash(repr(value))
+
+
+def _diff_node(old: Any, new: Any, path: str, items: Dict[str, Any], diffs: Dict[str, Any],
+               memo: Dict[int, int]):
+    # Different hashes prove a change without walking the subtree; equal hashes
+    # are confirmed once with ==, after which the subtree is never visited again.
+    if _subtree_hash(old, memo) == _subtree_hash(new, memo) and old == new:
+        return
+
+    def emit(entry_path, entry, entry_items=items):
+        if entry_items:
+            entry["item"] = next(iter(entry_items.values()))
+            entry["items"] = entry_items
+        diffs[entry_path or "/"] = entry
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in old:
+                emit(child, {"status": "added", "new_value": value})
+            else:
+                _diff_node(old[key], value, child, items, diffs, memo)
+        for key, value in old.items():
+            if key not in new:
+                emit(f"{path}/{_pointer_token(key)}", {"status": "removed", "old_value": value})
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        match_key = list_match_key(old, new)
+        if match_key is None:
+            for index in range(max(len(old), len(new))):
+                child = f"{path}/{index}"
+                if index >= len(old):
+                    emit(child, {"status": "added", "new_value": new[index]})
+                elif index >= len(new):
+                    emit(child, {"status": "removed", "old_value": old[index]})
+                else:
+                    _diff_node(old[index], new[index], child, items, diffs, memo)
+            return
+
+        old_by_key = {entry[match_key]: entry for entry in old}
+        new_keys = set()
+        for entry in new:
+            key = entry[match_key]
+            new_keys.add(key)
+            child = f"{path}/{_pointer_token(key)}"
+            child_items = {**items, path: key}
+            if key not in old_by_key:
+                emit(child, {"status": "added", "new_value": entry}, child_items)
+            else:
+                _diff_node(old_by_key[key], entry, child, child_items, diffs, memo)
+        for key, entry in old_by_key.items():
+            if key not in new_keys:
+                emit(f"{path}/{_pointer_token(key)}", {"status": "removed", "old_value": entry}, {**items, path: key})
+        return
+
+    emit(path, {"status": "modified", "old_value": old, "new_value": new})
+
+
 def diff_yaml(old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Any]:
-    diffs = {}
-    for key in new_data:
-        if key not in old_data:
-            diffs[key] = {"status": "added", "new_value": new_data[key]}
-        elif new_data[key] != old_data[key]:
-            diffs[key] = {
-                "status": "modified",
-                "old_value": old_data[key],
-                "new_value": new_data[key],
-            }
-    for key in old_data:
-        if key not in new_data:
-            diffs[key] = {"status": "removed", "old_value": old_data[key]}
+    """Recursively diffs two parsed documents.
+
+    Keys are JSON-Pointer paths. List items that carry a unique ``name`` are
+    matched by that name rather than by position and addressed by it
+    (``/organizations/my-org/email``); such entries and everything below them
+    carry ``items``, the matched name per named list keyed by the list's path,
+    and ``item``, the outermost of those names. Unchanged subtrees are skipped by
+    comparing their hashes, so the diff is linear in the size of the documents.
+    """
+    diffs: Dict[str, Any] = {}
+    with DIFF_SECONDS.time():
+        _diff_node(old_data or {}, new_data or {}, "", {}, diffs, {})
     return diffs
 
 
+def changed_items(diffs: Dict[str, Any], list_path: str) -> Dict[str, List[Any]]:
+    """Groups a diff into added/removed/modified item names under ``list_path``.
+
+    For ``list_path="/organizations"`` this is the minimal set of
+    organizations a reconcile run has to touch.
+    """
+    prefix = list_path.rstrip("/") + "/"
+    direct = {}
+    touched = []
+    list_path = prefix[:-1]
+    for path, entry in diffs.items():
+        if not path.startswith(prefix) or list_path not in entry.get("items", {}):
+            continue
+        name = entry["items"][list_path]
+        if "/" not in path[len(prefix):] and entry["status"] in ("added", "removed"):
+            direct[name] = entry["status"]
+        else:
+            touched.append(name)
+
+    result = {"added": [], "removed": [], "modified": []}
+    for name, status in direct.items():
+        result[status].append(name)
+    seen = set(direct)
+    for name in touched:
+        if name not in seen:
+            seen.add(name)
+            result["modified"].append(name)
+    return result
+
+
 def load_yaml_data(file_path: Path) -> Dict[str, Any]:
     """Load YAML content from file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    return read_yaml(file_path) or {}
 
 
 def load_old_snapshot(storage_dir: Path) -> Dict[str, Any]:
-    old_file = storage_dir / "last_yaml_snapshot.yaml"
-    if old_file.exists():
-        with open(old_file, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
-    return {}
+    return get_snapshot_store(storage_dir).latest()[1]
 
 
-def save_snapshot_and_hash(new_data: Dict[str, Any], new_hash: str, storage_dir: Path):
-    old_file = storage_dir / "last_yaml_snapshot.yaml"
-    with open(old_file, "w", encoding="utf-8") as f:
-        yaml.safe_dump(new_data, f)
-    save_yaml_hash(new_hash, storage_dir)
+def save_snapshot_and_hash(new_data: Dict[str, Any], new_hash: str, storage_dir: Path) -> int:
+    store = get_snapshot_store(storage_dir)
+    with store.lock():
+        return store.commit(new_data, new_hash)
 
 
 def check_yaml_change(
@@ -63,23 +182,55 @@ def check_yaml_change(
 ) -> dict:
     if not storage_dir:
         raise ValueError("storage_dir is required")
+    if new_data is None and not file_path:
+        raise ValueError("Either file_path or new_data must be provided")
 
-    old_hash = load_yaml_hash(storage_dir)
-
+    fingerprint = None
     if new_data is None:
-        if not file_path:
-            raise ValueError("Either file_path or new_data must be provided")
-        new_data = load_yaml_data(file_path)
+        # Fast path: an unchanged stat fingerprint means the file was not touched.
+        fingerprint = file_fingerprint(file_path)
+        memo_key = (str(storage_dir), str(file_path))
+        known = _fingerprints.get(memo_key)
+        if known is None:
+            known = _fingerprints[memo_key] = load_fingerprint(storage_dir)
+        if known and known == fingerprint:
+            return {"status": "unchanged", "message": "No changes detected"}
 
-    new_hash = get_yaml_hash(new_data)
+    # Compare and commit under one lock so concurrent checks cannot both
+    # diff against the same old snapshot and overwrite each other.
+    store = get_snapshot_store(storage_dir)
+    with store.lock():
+        old_hash = store.head().get("hash", "")
+        if new_data is None:
+            new_hash = get_yaml_hash(file_path)
+            if not has_yaml_changed(new_hash, old_hash):
+                _remember_fingerprint(memo_key, fingerprint, storage_dir)
+                return {"status": "unchanged", "message": "No changes detected"}
+            new_data = load_yaml_data(file_path)
+        else:
+            new_hash = get_yaml_hash(new_data)
+            if not has_yaml_changed(new_hash, old_hash):
+                return {"status": "unchanged", "message": "No changes detected"}
 
-    if has_yaml_changed(new_hash, old_hash):
-        old_data = load_old_snapshot(storage_dir)
+        revision, old_data = store.latest()
         diffs = diff_yaml(old_data, new_data)
-        save_snapshot_and_hash(new_data, new_hash, storage_dir)
-        return {"status": "changed", "message": "YAML updated", "diff": diffs}
+        if diffs or not revision:
+            revision = store.commit(new_data, new_hash)
+        else:
+            # Only comments or formatting changed; keep the revision, track the new bytes.
+            store.update_hash(new_hash)
+    if fingerprint is not None:
+        _remember_fingerprint((str(storage_dir), str(file_path)), fingerprint, storage_dir)
+    if not diffs:
+        return {"status": "unchanged", "message": "No changes detected"}
+    return {"status": "changed", "message": "YAML updated", "revision": revision, "diff": diffs}
+
 
-    return {"status": "unchanged", "message": "No changes detected"}
+def _remember_fingerprint(memo_key: tuple, fingerprint: Dict[str, Any], storage_dir: Path):
+    if not is_fingerprint_settled(fingerprint):
+        fingerprint = {}
+    _fingerprints[memo_key] = fingerprint
+    save_fingerprint(fingerprint, storage_dir)
 
 
 def view_yaml_diff_html(result: dict):
@@ -1,14 +1,50 @@
+import json
+import os
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional
 
-def save_yaml_hash(hash_value: str, storage_dir: Path):
+LIST_MATCH_KEYS = ("name",)
+
+# A file modified this recently may still change within the same mtime tick,
+# so its stat fingerprint is not trusted until it has settled.
+FINGERPRINT_SETTLE_NS = 2_000_000_000
+
+def file_fingerprint(file_path: Path) -> Dict[str, Any]:
+    stat = os.stat(file_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "inode": stat.st_ino}
+
+def is_fingerprint_settled(fingerprint: Dict[str, Any]) -> bool:
+    return time.time_ns() - fingerprint["mtime_ns"] > FINGERPRINT_SETTLE_NS
+
+def save_fingerprint(fingerprint: Optional[Dict[str, Any]], storage_dir: Path):
     storage_dir.mkdir(parents=True, exist_ok=True)
-    storage_file = storage_dir / "last_hash.txt"
+    storage_file = storage_dir / "last_fingerprint.json"
     with open(storage_file, "w", encoding="utf-8") as f:
-        f.write(hash_value)
-
-def load_yaml_hash(storage_dir: Path) -> str:
-    storage_file = storage_dir / "last_hash.txt"
-    if not storage_file.exists():
-        return ""
-    with open(storage_file, "r", encoding="utf-8") as f:
-        return f.read().strip()
\ No newline at end of file
+        json.dump(fingerprint or {}, f)
+
+def load_fingerprint(storage_dir: Path) -> Dict[str, Any]:
+    storage_file = storage_dir / "last_fingerprint.json"
+    try:
+        with open(storage_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def list_match_key(old_list: list, new_list: list) -> Optional[str]:
+    """Returns a key that uniquely identifies every item of both lists, if any."""
+    for key in LIST_MATCH_KEYS:
+        usable = True
+        for items in (old_list, new_list):
+            seen = set()
+            for item in items:
+                value = item.get(key) if isinstance(item, dict) else None
+                if value is None or not isinstance(value, (str, int)) or value in seen:
+                    usable = False
+                    break
+                seen.add(value)
+            if not usable:
+                break
+        if usable:
+            return key
+    return None
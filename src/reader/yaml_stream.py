@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Type, TypeVar, Union
+
+import yaml
+from yaml.events import (
+    AliasEvent, MappingEndEvent, MappingStartEvent, ScalarEvent,
+    SequenceEndEvent, SequenceStartEvent, StreamEndEvent,
+)
+from yaml.nodes import MappingNode, ScalarNode, SequenceNode
+
+from reader.yaml_reader import SafeLoader, get_type_adapter
+
+T = TypeVar("T")
+
+
+class YamlStreamError(ValueError):
+    """A parse or validation error for one streamed item, with its 1-based line."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def iter_yaml_items(source: Union[str, Path, IO], list_key: str, model: Type[T]) -> Iterator[T]:
+    """Yields one validated ``model`` per entry of ``list_key`` without loading the whole file.
+
+    Works on PyYAML's event stream, so only the item being validated is held
+    in memory. Accepted layouts, which may be mixed across documents of a
+    multi-document file:
+
+    - a mapping whose ``list_key`` holds a sequence of items (other keys are ignored),
+    - a document that is itself a sequence of items,
+    - a document that is a single item.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_stream(source, list_key, model)
+        return
+    with open(source, "r", encoding="utf-8") as f:
+        yield from _iter_stream(f, list_key, model)
+
+
+def iter_organizations(source: Union[str, Path, IO]) -> Iterator[Any]:
+    """Streams the ``organizations`` of a Quay config as validated ``Organization`` models."""
+    from models.quay_config import Organization
+    return iter_yaml_items(source, "organizations", Organization)
+
+
+def _iter_stream(stream: IO, list_key: str, model: Type[T]) -> Iterator[T]:
+    loader = SafeLoader(stream)
+    adapter = get_type_adapter(model)
+    try:
+        loader.get_event()  # StreamStartEvent
+        while not loader.check_event(StreamEndEvent):
+            loader.get_event()  # DocumentStartEvent
+            anchors: Dict[str, Any] = {}
+            if loader.check_event(SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(SequenceEndEvent):
+                    yield _validate(loader, adapter, _compose(loader, anchors))
+                loader.get_event()
+            elif loader.check_event(MappingStartEvent):
+                yield from _iter_mapping(loader, adapter, list_key, anchors)
+            else:
+                yield _validate(loader, adapter, _compose(loader, anchors))
+            loader.get_event()  # DocumentEndEvent
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        raise YamlStreamError(mark.line + 1 if mark else 0, str(e.problem or e)) from e
+    finally:
+        loader.dispose()
+
+
+def _iter_mapping(loader, adapter, list_key: str, anchors: Dict[str, Any]) -> Iterator[Any]:
+    start = loader.get_event()
+    pairs = []
+    found = False
+    while not loader.check_event(MappingEndEvent):
+        key = _compose(loader, anchors)
+        if isinstance(key, ScalarNode) and key.value == list_key:
+            found = True
+            if loader.check_event(SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(SequenceEndEvent):
+                    yield _validate(loader, adapter, _compose(loader, anchors))
+                loader.get_event()
+                continue
+            # An alias of a list; anything else must not fall back to
+            # validating the whole document as one item.
+            value = _compose(loader, anchors)
+            if not isinstance(value, SequenceNode):
+                raise YamlStreamError(value.start_mark.line + 1, f"{list_key} must be a list, got {_describe(value)}")
+            for item in value.value:
+                yield _validate(loader, adapter, item)
+        else:
+            pairs.append((key, _compose(loader, anchors)))
+    end = loader.get_event()
+    if not found:
+        # The document is a single item rather than a list of them.
+        tag = start.tag if start.tag not in (None, "!") else loader.resolve(MappingNode, None, start.implicit)
+        yield _validate(loader, adapter, MappingNode(tag, pairs, start.start_mark, end.end_mark,
+                                                     flow_style=start.flow_style))
+
+
+def _describe(node) -> str:
+    if isinstance(node, MappingNode):
+        return "a mapping"
+    if isinstance(node, SequenceNode):
+        return "a list"
+    return "null" if node.tag == "tag:yaml.org,2002:null" else f"{node.value!r}"
+
+
+def _compose(loader, anchors: Dict[str, Any]):
+    """Builds the node for the next complete value, like ``Composer.compose_node``.
+
+    ``CSafeLoader`` does not expose node composition for a sub-tree, so the
+    nodes are assembled here from its events.
+    """
+    event = loader.get_event()
+    if isinstance(event, AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(None, None, f"found undefined alias {event.anchor!r}",
+                                              event.start_mark)
+        return anchors[event.anchor]
+
+    if isinstance(event, ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(ScalarNode, event.value, event.implicit)
+        node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, SequenceStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(SequenceNode, None, event.implicit)
+        node = SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    elif isinstance(event, MappingStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(MappingNode, None, event.implicit)
+        node = MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    else:
+        raise yaml.composer.ComposerError(None, None, f"unexpected {type(event).__name__}", event.start_mark)
+
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    if isinstance(node, SequenceNode):
+        while not loader.check_event(SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(node, MappingNode):
+        while not loader.check_event(MappingEndEvent):
+            key = _compose(loader, anchors)
+            node.value.append((key, _compose(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    return node
+
+
+def _validate(loader, adapter, node):
+    from pydantic import ValidationError
+
+    line = node.start_mark.line + 1
+    data = loader.construct_document(node)
+    try:
+        return adapter.validate_python(data)
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or '<item>'}: {error['msg']}" for error in e.errors()
+        )
+        raise YamlStreamError(line, problems) from e
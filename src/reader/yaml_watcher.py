@@ -0,0 +1,229 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from reader.yaml_diff import check_yaml_change
+
+logging.basicConfig(level=logging.INFO)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding; watches the directory so atomic renames are seen."""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float):
+        """Returns the file names touched within ``timeout`` seconds."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class EventBroadcaster:
+    """Fans events out from worker threads to per-client asyncio queues."""
+
+    def __init__(self, client_queue_size: int = 100):
+        self.client_queue_size = client_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> "asyncio.Queue":
+        subscriber = asyncio.Queue(maxsize=self.client_queue_size)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), subscriber))
+        return subscriber
+
+    def unsubscribe(self, subscriber: "asyncio.Queue"):
+        with self._lock:
+            self._subscribers = {entry for entry in self._subscribers if entry[1] is not subscriber}
+
+    def publish(self, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, subscriber in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, subscriber, event)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+
+
+def _offer(subscriber: "asyncio.Queue", event: Dict[str, Any]):
+    # A slow client loses its oldest events instead of stalling everyone else.
+    if subscriber.full():
+        subscriber.get_nowait()
+    subscriber.put_nowait(event)
+
+
+class YamlWatcher:
+    """Watches the YAML file and feeds confirmed changes into a bounded queue.
+
+    Uses inotify where available and falls back to stat polling. Bursts of
+    writes are debounced, so one save triggers one ``check_yaml_change``. A
+    consumer thread drains the queue, optionally reconciles, and publishes
+    every result to the broadcaster.
+
+    Each confirmed change is committed to the snapshot store in
+    ``storage_dir``; give the watcher a directory of its own so that explicit
+    ``check_yaml_change`` calls on the main store still see every change.
+    """
+
+    def __init__(self, file_path: Path, storage_dir: Path,
+                 reconcile: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 debounce: float = 0.2, poll_interval: float = 1.0, queue_size: int = 16):
+        self.file_path = Path(file_path)
+        self.storage_dir = Path(storage_dir)
+        self.reconcile = reconcile
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.changes: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self.broadcaster = EventBroadcaster()
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_stat = None
+
+    def start(self):
+        for target, name in ((self._watch, "yaml-watcher"), (self._consume, "yaml-reconciler")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads.clear()
+
+    def _watch(self):
+        inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                inotify = _Inotify(self.file_path.parent)
+                logging.info("Watching '%s' with inotify.", self.file_path)
+            except (OSError, AttributeError) as e:
+                logging.warning("inotify unavailable (%s), falling back to polling.", e)
+        if inotify is None:
+            logging.info("Polling '%s' every %ss.", self.file_path, self.poll_interval)
+
+        self._last_stat = self._stat()
+        self._check()
+        try:
+            while not self._stop.is_set():
+                if inotify is not None:
+                    touched = self._wait_inotify(inotify)
+                else:
+                    touched = self._wait_poll()
+                if touched:
+                    self._check()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _wait_inotify(self, inotify: _Inotify) -> bool:
+        touched = inotify.wait(self.poll_interval)
+        # Kubernetes ConfigMap volumes swap a "..data" symlink instead of
+        # writing the file itself.
+        if not any(name == self.file_path.name or name.startswith("..") for name in touched):
+            return False
+        deadline = time.monotonic() + 10 * self.debounce
+        while time.monotonic() < deadline and inotify.wait(self.debounce):
+            pass
+        return True
+
+    def _wait_poll(self) -> bool:
+        if self._stop.wait(self.poll_interval):
+            return False
+        current = self._stat()
+        if current == self._last_stat:
+            return False
+        while not self._stop.wait(self.debounce):
+            settled = self._stat()
+            if settled == current:
+                break
+            current = settled
+        self._last_stat = current
+        return True
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def _check(self):
+        if not self.file_path.exists():
+            return
+        try:
+            result = check_yaml_change(self.storage_dir, self.file_path)
+        except Exception as e:
+            logging.error("YAML check after file change failed: %s", e)
+            self.broadcaster.publish({"type": "error", "message": str(e)})
+            return
+        if result.get("status") != "changed":
+            return
+        # Each diff is relative to the previous revision, so none may be dropped;
+        # a full queue holds the watcher back until the consumer catches up.
+        while not self._stop.is_set():
+            try:
+                self.changes.put(result, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _consume(self):
+        while not self._stop.is_set():
+            try:
+                change = self.changes.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.broadcaster.publish({"type": "change", **change})
+            if self.reconcile is None:
+                continue
+            try:
+                self.broadcaster.publish({"type": "reconcile", "status": "ok", "results": self.reconcile(change)})
+            except Exception as e:
+                logging.error("Reconcile after YAML change failed: %s", e)
+                self.broadcaster.publish({"type": "reconcile", "status": "error", "message": str(e)})
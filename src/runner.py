@@ -1,50 +1,177 @@
+import argparse
+import time
+import uuid
 import yaml
-import importlib
+from pathlib import Path
 from actions import JOB_REGISTRY
+from pipeline.compiler import compile_pipeline, resolve_action
+from pipeline.journal import StepJournal, step_input_hashes
+from pipeline.scheduler import run_dag, critical_path, POLICIES, PipelineError
+from pipeline.templates import compile_template
+from metrics.registry import histogram
+
+PIPELINE_STEP = "pipeline.step"
+
+STEP_SECONDS = histogram("quay_pipeline_step_duration_seconds", "Duration of pipeline steps.", ("job", "status"))
 
 def load_yaml(path):
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
-def resolve_placeholders(data, inputs):
-    if isinstance(data, str) and "{{" in data:
-        key = data.replace("{{ inputs.", "").replace(" }}", "")
-        return inputs.get(key, "")
-    if isinstance(data, dict):
-        return {k: resolve_placeholders(v, inputs) for k, v in data.items()}
-    if isinstance(data, list):
-        return [resolve_placeholders(i, inputs) for i in data]
-    return data
+def resolve_placeholders(data, inputs, extra=None):
+    return compile_template(data)({"inputs": inputs, **(extra or {})})
 
-def run_function(job_name, params):
-    module = importlib.import_module("actions")
+def timed_step(job_name, func, *args, **kwargs):
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        result = func(*args, **kwargs)
+        status = "succeeded"
+        return result
+    finally:
+        STEP_SECONDS.labels(job_name, status).observe(time.perf_counter() - started)
 
+def run_function(job_name, params):
     action = JOB_REGISTRY.get(job_name)
-    if not action:
-        print(f"❌ Unknown job: '{job_name}'. Allowed: {list(JOB_REGISTRY.keys())}")
-        return
+    func = resolve_action(job_name)
+    if action:
+        print(f"➡️ Running: {action}()")
+    if isinstance(params, dict):
+        return timed_step(job_name, func, **params)
+    return timed_step(job_name, func)
+
+def run_step(step):
+    print(f"➡️ Running: {step.id} ({step.job})")
+    return timed_step(step.job, step.run)
+
+def run_step_job(payload):
+    """Job handler for a step queued by ``run_queued_step``."""
+    return timed_step(payload["job"], resolve_action(payload["job"]), **payload["params"])
+
+def run_queued_step(queue, step, input_hash, run_key):
+    """Runs a step through the shared job queue and waits for its outcome.
+
+    The idempotency key is ``run_key`` (the pipeline and run) plus the
+    step's input hash, so runners started with the same run id execute each
+    step once and share the result, while a later run executes it again.
+    """
+    print(f"➡️ Queued: {step.id} ({step.job})")
+    job = queue.enqueue(PIPELINE_STEP, {"job": step.job, "params": dict(step.params)},
+                        idempotency_key=f"pipeline:{run_key}:{input_hash}", requeue_failed=True)
+    job = queue.wait(job.id)
+    if job.status != "done":
+        raise PipelineError(job.error or f"Step '{step.id}' failed")
+    return job.result
+
+def steps_from(steps, start):
+    """Returns the ids of the steps named or id'd ``start`` and everything downstream of them."""
+    selected = {step.id for step in steps if start in (step.id, step.name)}
+    if not selected:
+        raise ValueError(f"Unknown step '{start}'")
+    changed = True
+    while changed:
+        changed = False
+        for step in steps:
+            if step.id not in selected and selected.intersection(step.needs):
+                selected.add(step.id)
+                changed = True
+    return selected
+
+def print_report(steps, results, elapsed, reused=()):
+    icons = {"succeeded": "✅", "failed": "❌", "skipped": "⏭️", "reused": "♻️"}
+    for step in steps:
+        result = results[step.id]
+        status = "reused" if step.id in reused else result.status
+        line = f"{icons.get(status, '•')} {step.id}: {status} in {result.duration:.3f}s"
+        if result.error:
+            line += f" ({result.error})"
+        print(line)
+
+    path, duration = critical_path(steps, results)
+    if path:
+        print(f"🧭 Critical path ({duration:.3f}s): {' -> '.join(path)}")
+    print(f"⏱️ Wall clock: {elapsed:.3f}s")
+
+def run_pipeline(struct_file="struct.yaml", max_workers=None, policy=None, force=False, from_step=None,
+                 queue_path=None, run_id=None):
+    plan = compile_pipeline(struct_file)
+    steps = plan.steps
 
-    func = getattr(module, action)
-    print(f"➡️ Running: {action}()")
-    return func(**params) if isinstance(params, dict) else func()
+    workers = max_workers or plan.max_workers
+    policy = policy or plan.on_error
 
-def run_pipeline(struct_file="struct.yaml"):
-    struct = load_yaml(struct_file)
-    inputs = load_yaml(struct["input_file"])
+    journal = StepJournal.for_struct(struct_file)
+    previous = {} if force else journal.load()
+    hashes = step_input_hashes(steps)
+    rerun = steps_from(steps, from_step) if from_step else set()
+    reused = set()
 
-    pipeline = struct.get("pipeline", [])
+    queue = worker = None
+    if queue_path:
+        from jobs.queue import get_job_queue
+        from jobs.worker import JobWorker
+        queue = get_job_queue(queue_path)
+        worker = JobWorker(queue, {PIPELINE_STEP: run_step_job}, concurrency=workers)
+        worker.start()
+    # Runners share queued steps only within one run of one pipeline file.
+    run_key = f"{Path(struct_file).resolve()}:{run_id or uuid.uuid4().hex}"
 
-    for step in pipeline:
-        if not step.get("enabled", False):
-            continue
+    def execute(step):
+        input_hash = hashes[step.id]
+        last = previous.get(step.id)
+        if (step.id not in rerun and last and last["status"] == "succeeded"
+                and last["input_hash"] == input_hash):
+            reused.add(step.id)
+            return None
+        started = time.monotonic()
+        try:
+            if queue is None:
+                result = run_step(step)
+            else:
+                result = run_queued_step(queue, step, input_hash, run_key)
+        except Exception as e:
+            journal.record(step.id, input_hash, "failed", time.monotonic() - started, str(e))
+            raise
+        journal.record(step.id, input_hash, "succeeded", time.monotonic() - started)
+        return result
 
-        job_name = step.get("job")
-        params = step.get("params", {})
-        params = resolve_placeholders(params, inputs)
+    started = time.monotonic()
+    try:
+        results = run_dag(steps, execute, workers, policy)
+    finally:
+        if worker is not None:
+            worker.stop()
+    elapsed = time.monotonic() - started
+    print_report(steps, results, elapsed, reused)
 
-        run_function(job_name, params)
+    failed = [step_id for step_id, result in results.items() if result.status != "succeeded"]
+    if failed:
+        print(f"❌ Pipeline finished with {len(failed)} unsuccessful step(s).")
+    else:
+        print("✅ Pipeline completed.")
 
-    print("✅ Pipeline completed.")
+    path, critical = critical_path(steps, results)
+    return {
+        "status": "failed" if failed else "succeeded",
+        "elapsed": elapsed,
+        "critical_path": {"steps": path, "duration": critical},
+        "steps": {
+            step_id: {"status": "reused" if step_id in reused else r.status, "duration": r.duration, "error": r.error}
+            for step_id, r in results.items()
+        },
+    }
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run a struct.yaml pipeline.")
+    parser.add_argument("struct_file", nargs="?", default="struct.yaml")
+    parser.add_argument("--workers", type=int, default=None, help="maximum number of steps run in parallel")
+    parser.add_argument("--on-error", choices=POLICIES, default=None, help="stop on first failure or keep going")
+    parser.add_argument("--force", action="store_true", help="ignore the journal and run every step")
+    parser.add_argument("--from", dest="from_step", default=None, help="re-run this step and everything after it")
+    parser.add_argument("--queue", dest="queue_path", default=None,
+                        help="SQLite job queue shared with other runners; each step then runs once across them")
+    parser.add_argument("--run-id", default=None,
+                        help="with --queue, runners given the same run id share steps (default: a fresh id per run)")
+    args = parser.parse_args()
+    run_pipeline(args.struct_file, max_workers=args.workers, policy=args.on_error,
+                 force=args.force, from_step=args.from_step, queue_path=args.queue_path, run_id=args.run_id)
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+
+# Factories are "module:attribute" paths so a service's module is only
+# imported when that service is first requested.
+SERVICES: Dict[str, str] = {
+    "organizations": "services.organization_service:OrganizationService",
+    "organizations_async": "services.organization_service:AsyncOrganizationService",
+    "proxy_caches": "services.porxy_cache_service:ProxyCacheService",
+    "proxy_caches_async": "services.porxy_cache_service:AsyncProxyCacheService",
+    "organization_planner": "services.organization_planner:OrganizationPlanner",
+}
+
+
+# Settings with a built-in fallback; main.py and the environment check share these.
+ENV_DEFAULTS: Dict[str, str] = {
+    "YAML_FILE_PATH": str(Path(__file__).resolve().parent.parent / "yaml" / "test.yaml"),
+    "YAML_STORAGE_PATH": "./storage",
+}
+
+
+class ServiceConfigurationError(ValueError):
+    """Raised when a service cannot be built because its settings are missing."""
+
+
+@lru_cache(maxsize=None)
+def load_env() -> bool:
+    """Loads ``.env`` into the process environment, once per process."""
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+
+def env_setting(name: str) -> Optional[str]:
+    """Returns the environment value of ``name``, or its entry in ``ENV_DEFAULTS``."""
+    load_env()
+    return os.getenv(name) or ENV_DEFAULTS.get(name)
+
+
+def api_settings() -> Tuple[str, str]:
+    """Returns ``(API_BASE_URL, API_TOKEN)`` or raises ``ServiceConfigurationError``."""
+    load_env()
+    base_url = os.getenv("API_BASE_URL")
+    token = os.getenv("API_TOKEN")
+    if not base_url or not token:
+        logging.error("Missing environment variables: API_BASE_URL or API_TOKEN")
+        raise ServiceConfigurationError("Environment variables API_BASE_URL and API_TOKEN must be set")
+    return base_url, token
+
+
+def _resolve(factory: Union[str, Callable[[], Any]]) -> Callable[[], Any]:
+    if callable(factory):
+        return factory
+    module, _, attribute = factory.partition(":")
+    return getattr(import_module(module), attribute)
+
+
+class ServiceContainer:
+    """Builds each registered service once, on first use, and shares that instance.
+
+    A failed build is not cached, so a missing setting is reported again on
+    the next request instead of leaving a broken instance behind.
+    """
+
+    def __init__(self, factories: Dict[str, Union[str, Callable[[], Any]]] = SERVICES):
+        self._factories = dict(factories)
+        self._instances: Dict[str, Any] = {}
+        # Reentrant: building the planner builds the organization service.
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Union[str, Callable[[], Any]]):
+        """Adds or replaces the factory for ``name``; an existing instance is dropped."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    if name not in self._factories:
+                        raise KeyError(f"Unknown service '{name}'")
+                    instance = _resolve(self._factories[name])()
+                    self._instances[name] = instance
+        return instance
+
+    def reset(self):
+        """Drops all built instances, e.g. after the API settings changed."""
+        with self._lock:
+            self._instances.clear()
+
+
+CONTAINER = ServiceContainer()
+
+
+def get_organization_service():
+    return CONTAINER.get("organizations")
+
+
+def get_async_organization_service():
+    return CONTAINER.get("organizations_async")
+
+
+def get_proxy_cache_service():
+    return CONTAINER.get("proxy_caches")
+
+
+def get_async_proxy_cache_service():
+    return CONTAINER.get("proxy_caches_async")
+
+
+def get_organization_planner():
+    return CONTAINER.get("organization_planner")
@@ -0,0 +1,123 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from api.async_client import gather_bounded
+from models.quay_config import Organization, QuayConfig
+
+logging.basicConfig(level=logging.INFO)
+
+
+@dataclass
+class OrganizationPlan:
+    create: List[Dict[str, Any]] = field(default_factory=list)
+    update: List[Dict[str, Any]] = field(default_factory=list)
+    delete: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def is_empty(self) -> bool:
+        return not (self.create or self.update or self.delete)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "create": self.create,
+            "update": self.update,
+            "delete": self.delete,
+            "skipped": self.skipped,
+            "unchanged": self.unchanged,
+        }
+
+
+def build_plan(desired: Union[QuayConfig, Iterable[Organization]],
+               live: Iterable[Dict[str, Any]],
+               prune: bool = False) -> OrganizationPlan:
+    """Computes the minimal create/update/delete plan in a single pass over each side.
+
+    Deletions are only planned with ``prune=True``; a registry usually holds
+    organizations that are not managed by this config.
+    """
+    if isinstance(desired, QuayConfig):
+        desired = desired.organizations
+
+    live_by_name = {org["name"]: org for org in live if org.get("name")}
+    plan = OrganizationPlan()
+    seen = set()
+
+    for org in desired:
+        if org.name in seen:
+            logging.warning("Duplicate organization '%s' in config, keeping the first entry.", org.name)
+            continue
+        seen.add(org.name)
+
+        current = live_by_name.get(org.name)
+        if current is None and not org.email:
+            logging.warning("Skipping organization '%s': an email is required to create it.", org.name)
+            plan.skipped.append(org.name)
+        elif current is None:
+            plan.create.append({"name": org.name, "email": org.email})
+        elif org.email and "email" in current and current["email"] != org.email:
+            plan.update.append({"name": org.name, "email": org.email, "old_email": current["email"]})
+        else:
+            plan.unchanged += 1
+
+    if prune:
+        plan.delete = [name for name in live_by_name if name not in seen]
+    return plan
+
+
+class OrganizationPlanner:
+    def __init__(self, service=None):
+        if service is None:
+            from services.container import get_organization_service
+            service = get_organization_service()
+        self.service = service
+
+    def plan(self, desired: Union[QuayConfig, Iterable[Organization]], prune: bool = False) -> OrganizationPlan:
+        live = self.service.list_organizations().get("organizations", [])
+        plan = build_plan(desired, live, prune=prune)
+        logging.info(
+            "Plan: %s to create, %s to update, %s to delete, %s unchanged.",
+            len(plan.create), len(plan.update), len(plan.delete), plan.unchanged,
+        )
+        return plan
+
+    def apply(self, plan: OrganizationPlan) -> List[Dict[str, Any]]:
+        results = []
+        for org in plan.create:
+            results.append(_run_step(org["name"], "created", self.service.create_organization, org["name"], org["email"]))
+        for org in plan.update:
+            results.append(_run_step(org["name"], "updated", self.service.update_organization, org["name"], org["email"]))
+        for name in plan.delete:
+            results.append(_run_step(name, "deleted", self.service.delete_organization, name))
+        logging.info("Plan applied.")
+        return results
+
+
+async def apply_plan_async(plan: OrganizationPlan, service, concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Applies a plan through ``AsyncOrganizationService`` with bounded concurrency."""
+    actions = (
+        [(org["name"], "created", service.create_organization, (org["name"], org["email"])) for org in plan.create]
+        + [(org["name"], "updated", service.update_organization, (org["name"], org["email"])) for org in plan.update]
+        + [(name, "deleted", service.delete_organization, (name,)) for name in plan.delete]
+    )
+
+    async def run(action):
+        name, status, func, args = action
+        try:
+            return {"name": name, "status": status, "response": await func(*args)}
+        except Exception as e:
+            logging.error("Error applying plan for organization '%s': %s", name, e)
+            return {"name": name, "status": "failed", "error": str(e)}
+
+    results = await gather_bounded(run, actions, concurrency or service.concurrency)
+    logging.info("Plan applied.")
+    return results
+
+
+def _run_step(name, status, func, *args):
+    try:
+        return {"name": name, "status": status, "response": func(*args)}
+    except Exception as e:
+        logging.error("Error applying plan for organization '%s': %s", name, e)
+        return {"name": name, "status": "failed", "error": str(e)}
@@ -2,97 +2,207 @@ import logging
 
 logging.basicConfig(level=logging.INFO)
 
-from api.client import ApiClient
-from dotenv import load_dotenv
-import os
+from api.client import get_client
+from api.async_client import get_async_client, gather_bounded, DEFAULT_BULK_CONCURRENCY
+from api.pagination import iter_paginated, aiter_paginated, name_prefix_filter
+from services.container import api_settings
 import json
+from typing import AsyncIterator, Iterable, Iterator, Optional
 
-class OrganizationService:
-    def __init__(self):
-        load_dotenv()
-        self.base_url = os.getenv("API_BASE_URL")
-        self.token = os.getenv("API_TOKEN")
+ORGANIZATIONS_LIST_ENDPOINT = "superuser/organizations/"
+
+def _handle_create_error(name: str, e: Exception):
+    error_message = str(e)
+    if hasattr(e, "response") and e.response is not None:
+        try:
+            api_error = e.response.json()
+            error_message = api_error.get("message", str(api_error))
+        except Exception:
+            error_message = e.response.text
+
+    # Prüfe auf bekannte, harmlose Fehler
+    if "already exists" in error_message.lower() or "email has already been used" in error_message.lower():
+        logging.error("Skipping creation: Organization '%s' already exists or email in use.", name)
+        return None
+
+    logging.error("Failed to create organization '%s': %s", name, error_message)
+    raise Exception(f"Failed to create organization '{name}': {error_message}")
+
+def _org_fields(org):
+    """Accepts plain dicts as well as ``Organization`` models, e.g. from ``iter_organizations``."""
+    if isinstance(org, dict):
+        return org.get("name"), org.get("email")
+    return getattr(org, "name", None), getattr(org, "email", None)
 
-        if not self.base_url or not self.token:
-            logging.error("Missing environment variables: API_BASE_URL or API_TOKEN")
-            raise ValueError("Environment variables API_BASE_URL and API_TOKEN must be set")
 
-        self.client = ApiClient(self.base_url, self.token)
+class OrganizationService:
+    def __init__(self):
+        self.base_url, self.token = api_settings()
+        self.client = get_client(self.base_url, self.token)
         logging.info("OrganizationService initialized successfully")
 
-    def list_organizations(self):
-        logging.info("Listing all organizations...")
+    def iter_organizations(self, prefix: Optional[str] = None, prefetch: bool = True) -> Iterator[dict]:
+        """Yields organizations page by page, optionally only those whose name starts with ``prefix``."""
         try:
-            response = self.client.get("superuser/organizations/")
-            logging.info("Organizations fetched successfully.")
-            return response
+            yield from iter_paginated(self.client, ORGANIZATIONS_LIST_ENDPOINT, "organizations",
+                                      predicate=name_prefix_filter(prefix), prefetch=prefetch)
         except Exception as e:
-            logging.error(f"Failed to list organizations: {e}")
+            logging.error("Failed to list organizations: %s", e)
             raise
 
+    def list_organizations(self, prefix: Optional[str] = None):
+        logging.info("Listing all organizations...")
+        organizations = list(self.iter_organizations(prefix))
+        logging.info("Organizations fetched successfully (%s total).", len(organizations))
+        return {"organizations": organizations}
+
     def create_organization(self, name: str, email: str):
-        logging.info(f"Creating organization '{name}' with email '{email}'...")
+        logging.info("Creating organization '%s' with email '%s'...", name, email)
         data = {
             "name": name,
             "email": email
         }
         try:
-            response = self.client.post("organization/", data=json.dumps(data))
-            logging.info(f"Organization '{name}' created successfully.")
+            response = self.client.post("organization/", data=json.dumps(data),
+                                        invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' created successfully.", name)
             return response
         except Exception as e:
-            error_message = str(e)
-            if hasattr(e, "response") and e.response is not None:
-                try:
-                    api_error = e.response.json()
-                    error_message = api_error.get("message", str(api_error))
-                except Exception:
-                    error_message = e.response.text
-
-            # Prüfe auf bekannte, harmlose Fehler
-            if "already exists" in error_message.lower() or "email has already been used" in error_message.lower():
-                logging.error(f"Skipping creation: Organization '{name}' already exists or email in use.")
-                return None
+            return _handle_create_error(name, e)
 
-            logging.error(f"Failed to create organization '{name}': {error_message}")
-            raise Exception(f"Failed to create organization '{name}': {error_message}")
+    def update_organization(self, name: str, email: str):
+        logging.info("Updating organization '%s' with email '%s'...", name, email)
+        try:
+            response = self.client.put(f"organization/{name}", data=json.dumps({"email": email}),
+                                        invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' updated successfully.", name)
+            return response
+        except Exception as e:
+            logging.error("Failed to update organization '%s': %s", name, e)
+            raise
 
     def get_organization(self, name: str):
-        logging.info(f"Fetching organization '{name}' details...")
+        logging.info("Fetching organization '%s' details...", name)
         try:
             response = self.client.get(f"organization/{name}")
-            logging.info(f"Organization '{name}' details retrieved successfully.")
+            logging.info("Organization '%s' details retrieved successfully.", name)
             return response
         except Exception as e:
-            logging.error(f"Failed to fetch organization '{name}': {e}")
+            logging.error("Failed to fetch organization '%s': %s", name, e)
             raise
 
     def delete_organization(self, name: str):
-        logging.info(f"Deleting organization '{name}'...")
+        logging.info("Deleting organization '%s'...", name)
         try:
-            response = self.client.delete(f"organization/{name}")
-            logging.info(f"Organization '{name}' deleted successfully.")
+            response = self.client.delete(f"organization/{name}", invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' deleted successfully.", name)
             return response
         except Exception as e:
-            logging.error(f"Failed to delete organization '{name}': {e}")
+            logging.error("Failed to delete organization '%s': %s", name, e)
             raise
 
-    def create_organizations_from_list(self, organizations: list[dict]):
+    def create_organizations_from_list(self, organizations: Iterable):
         results = []
         for org in organizations:
-            name = org.get("name")
-            email = org.get("email")
+            name, email = _org_fields(org)
             if not name or not email:
-                logging.warning(f"Skipping invalid entry: {org}")
+                logging.warning("Skipping invalid entry: %s", org)
                 continue
 
             try:
-                logging.info(f"Creating organization '{name}'...")
+                logging.info("Creating organization '%s'...", name)
                 response = self.create_organization(name, email)
-                logging.info(f"Organization '{name}' created successfully.")
+                logging.info("Organization '%s' created successfully.", name)
                 results.append({"name": name, "status": "created", "response": response})
             except Exception as e:
-                logging.error(f"Error creating organization '{name}': {e}")
+                logging.error("Error creating organization '%s': %s", name, e)
                 results.append({"name": name, "status": "failed", "error": str(e)})
         logging.info("Bulk organization creation process completed.")
-        return results
\ No newline at end of file
+        return results
+
+
+class AsyncOrganizationService:
+    def __init__(self, concurrency: int = DEFAULT_BULK_CONCURRENCY):
+        self.base_url, self.token = api_settings()
+        self.client = get_async_client(self.base_url, self.token)
+        self.concurrency = concurrency
+        logging.info("AsyncOrganizationService initialized successfully")
+
+    async def iter_organizations(self, prefix: Optional[str] = None,
+                                 prefetch: bool = True) -> AsyncIterator[dict]:
+        """Async counterpart of ``OrganizationService.iter_organizations``."""
+        try:
+            async for org in aiter_paginated(self.client, ORGANIZATIONS_LIST_ENDPOINT, "organizations",
+                                             predicate=name_prefix_filter(prefix), prefetch=prefetch):
+                yield org
+        except Exception as e:
+            logging.error("Failed to list organizations: %s", e)
+            raise
+
+    async def list_organizations(self, prefix: Optional[str] = None):
+        logging.info("Listing all organizations...")
+        organizations = [org async for org in self.iter_organizations(prefix)]
+        logging.info("Organizations fetched successfully (%s total).", len(organizations))
+        return {"organizations": organizations}
+
+    async def create_organization(self, name: str, email: str):
+        logging.info("Creating organization '%s' with email '%s'...", name, email)
+        data = {
+            "name": name,
+            "email": email
+        }
+        try:
+            response = await self.client.post("organization/", data=json.dumps(data),
+                                              invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' created successfully.", name)
+            return response
+        except Exception as e:
+            return _handle_create_error(name, e)
+
+    async def update_organization(self, name: str, email: str):
+        logging.info("Updating organization '%s' with email '%s'...", name, email)
+        try:
+            response = await self.client.put(f"organization/{name}", data=json.dumps({"email": email}),
+                                              invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' updated successfully.", name)
+            return response
+        except Exception as e:
+            logging.error("Failed to update organization '%s': %s", name, e)
+            raise
+
+    async def get_organization(self, name: str):
+        logging.info("Fetching organization '%s' details...", name)
+        try:
+            response = await self.client.get(f"organization/{name}")
+            logging.info("Organization '%s' details retrieved successfully.", name)
+            return response
+        except Exception as e:
+            logging.error("Failed to fetch organization '%s': %s", name, e)
+            raise
+
+    async def delete_organization(self, name: str):
+        logging.info("Deleting organization '%s'...", name)
+        try:
+            response = await self.client.delete(f"organization/{name}", invalidates=[ORGANIZATIONS_LIST_ENDPOINT])
+            logging.info("Organization '%s' deleted successfully.", name)
+            return response
+        except Exception as e:
+            logging.error("Failed to delete organization '%s': %s", name, e)
+            raise
+
+    async def create_organizations_from_list(self, organizations: Iterable):
+        async def create_one(org):
+            name, email = _org_fields(org)
+            if not name or not email:
+                logging.warning("Skipping invalid entry: %s", org)
+                return None
+            try:
+                response = await self.create_organization(name, email)
+                return {"name": name, "status": "created", "response": response}
+            except Exception as e:
+                logging.error("Error creating organization '%s': %s", name, e)
+                return {"name": name, "status": "failed", "error": str(e)}
+
+        results = await gather_bounded(create_one, organizations, self.concurrency)
+        logging.info("Bulk organization creation process completed.")
+        return [result for result in results if result is not None]
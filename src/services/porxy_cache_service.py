@@ -1,61 +1,294 @@
 import logging
 import json
-import os
-from dotenv import load_dotenv
-from api.client import ApiClient
+from typing import Any, Dict, Iterable, List, Optional
+from services.container import api_settings
+from api.client import get_client
+from api.async_client import get_async_client, gather_bounded, DEFAULT_BULK_CONCURRENCY
+from models.quay_config import ProxyCache
 
 logging.basicConfig(level=logging.INFO)
 
-class ProxyCacheService:
-    def __init__(self):
-        load_dotenv()
-        self.base_url = os.getenv("API_BASE_URL")
-        self.token = os.getenv("API_TOKEN")
 
-        if not self.base_url or not self.token:
-            logging.error("Missing environment variables: API_BASE_URL or API_TOKEN")
-            raise ValueError("Environment variables API_BASE_URL and API_TOKEN must be set")
+def _proxy_cache_payload(org_name, expiration_s, insecure, upstream_registry,
+                         upstream_registry_username, upstream_registry_password):
+    return {
+        "expiration_s": expiration_s,
+        "insecure": insecure,
+        "org_name": org_name,
+        "upstream_registry": upstream_registry,
+        "upstream_registry_username": upstream_registry_username,
+        "upstream_registry_password": upstream_registry_password
+    }
+
+# Fields Quay returns for an existing proxy cache; the password is write-only.
+PROXY_CACHE_COMPARED_FIELDS = ("upstream_registry", "expiration_s", "insecure", "upstream_registry_username")
+
+
+def _as_spec(spec) -> ProxyCache:
+    return spec if isinstance(spec, ProxyCache) else ProxyCache(**spec)
+
+
+def _unique_specs(specs: Iterable) -> List[ProxyCache]:
+    unique, seen = [], set()
+    for spec in map(_as_spec, specs):
+        if spec.org_name in seen:
+            logging.warning("Duplicate proxy cache spec for '%s', keeping the first entry.", spec.org_name)
+            continue
+        seen.add(spec.org_name)
+        unique.append(spec)
+    return unique
+
+
+def proxy_cache_changes(current: Optional[Dict[str, Any]], spec: ProxyCache,
+                        rotate_credentials: bool = False) -> Optional[List[str]]:
+    """Returns the fields that differ from Quay, ``None`` if no proxy cache exists yet.
+
+    Empty strings and ``None`` are treated alike. The password cannot be read
+    back, so it only counts as changed with ``rotate_credentials=True``.
+    """
+    if not current or not current.get("upstream_registry"):
+        return None
+    changed = [
+        field for field in PROXY_CACHE_COMPARED_FIELDS
+        if (current.get(field) or None) != (getattr(spec, field) or None)
+    ]
+    if rotate_credentials and spec.upstream_registry_password:
+        changed.append("upstream_registry_password")
+    return changed
+
+
+def missing_credentials(current: Dict[str, Any], spec: ProxyCache) -> bool:
+    """True if replacing ``current`` with ``spec`` would leave an upstream username without its password.
+
+    Quay has no update call, so a change means delete and create. The stored
+    password cannot be read back, so a ``spec`` that keeps or sets a username
+    must supply the password itself; one without a username removes the
+    credentials, which needs no password.
+    """
+    return bool(spec.upstream_registry_username) and not spec.upstream_registry_password
+
+
+def _restore_kwargs(current: Dict[str, Any], org_name: str) -> Optional[Dict[str, Any]]:
+    """``create_proxy_cache`` arguments that recreate ``current``; None if it had credentials."""
+    if current.get("upstream_registry_username"):
+        return None
+    return {"org_name": org_name, "upstream_registry": current["upstream_registry"],
+            "expiration_s": current.get("expiration_s", 86400), "insecure": current.get("insecure", False)}
 
-        self.client = ApiClient(self.base_url, self.token)
+
+def _ensure_result(spec: ProxyCache, status: str, changed=(), error: Optional[str] = None) -> Dict[str, Any]:
+    result = {"org_name": spec.org_name, "upstream_registry": spec.upstream_registry,
+              "status": status, "changed_fields": list(changed)}
+    if error is not None:
+        result["error"] = error
+    return result
+
+
+def _skipped_result(spec: ProxyCache, changed: List[str]) -> Dict[str, Any]:
+    logging.warning("Not replacing proxy cache for '%s': it needs upstream_registry_password.", spec.org_name)
+    return _ensure_result(spec, "skipped", changed,
+                          error="changes require upstream_registry_password to replace the config")
+
+
+def _replace_failed_result(spec: ProxyCache, changed: List[str], current: Dict[str, Any],
+                           error: Exception, restore_error: Optional[Exception]) -> Dict[str, Any]:
+    if restore_error is None:
+        message = f"{error}; previous config restored"
+    else:
+        message = f"{error}; previous config could not be restored ({restore_error}), organization has no proxy cache"
+        logging.error("Proxy cache for '%s' was deleted and not recreated: %s", spec.org_name, message)
+    result = _ensure_result(spec, "failed", changed, error=message)
+    result["restored"] = restore_error is None
+    result["previous"] = {field: current.get(field) for field in PROXY_CACHE_COMPARED_FIELDS}
+    return result
+
+
+class _NotRestorable(Exception):
+    def __str__(self):
+        return "its upstream password is write-only"
+
+
+class ProxyCacheService:
+    def __init__(self):
+        self.base_url, self.token = api_settings()
+        self.client = get_client(self.base_url, self.token)
         logging.info("ProxyCacheService initialized successfully")
 
     def create_proxy_cache(self, org_name: str, expiration_s: int = 86400, insecure: bool = False,
                            upstream_registry: str = "docker.io",
                            upstream_registry_username: str = None,
                            upstream_registry_password: str = None):
-        logging.info(f"Creating proxy cache for organization '{org_name}'...")
-        data = {
-            "expiration_s": expiration_s,
-            "insecure": insecure,
-            "org_name": org_name,
-            "upstream_registry": upstream_registry,
-            "upstream_registry_username": upstream_registry_username,
-            "upstream_registry_password": upstream_registry_password
-        }
+        logging.info("Creating proxy cache for organization '%s'...", org_name)
+        data = _proxy_cache_payload(org_name, expiration_s, insecure, upstream_registry,
+                                    upstream_registry_username, upstream_registry_password)
         try:
             response = self.client.post(f"organization/{org_name}/proxycache", data=json.dumps(data))
-            logging.info(f"Proxy cache for organization '{org_name}' created successfully.")
+            logging.info("Proxy cache for organization '%s' created successfully.", org_name)
             return response
         except Exception as e:
-            logging.error(f"Failed to create proxy cache for '{org_name}': {e}")
+            logging.error("Failed to create proxy cache for '%s': %s", org_name, e)
             raise
 
     def get_proxy_cache(self, org_name: str):
-        logging.info(f"Fetching proxy cache for organization '{org_name}'...")
+        logging.info("Fetching proxy cache for organization '%s'...", org_name)
         try:
             response = self.client.get(f"organization/{org_name}/proxycache")
-            logging.info(f"Proxy cache for '{org_name}' retrieved successfully.")
+            logging.info("Proxy cache for '%s' retrieved successfully.", org_name)
             return response
         except Exception as e:
-            logging.error(f"Failed to fetch proxy cache for '{org_name}': {e}")
+            logging.error("Failed to fetch proxy cache for '%s': %s", org_name, e)
             raise
 
     def delete_proxy_cache(self, org_name: str):
-        logging.info(f"Deleting proxy cache for organization '{org_name}'...")
+        logging.info("Deleting proxy cache for organization '%s'...", org_name)
         try:
             response = self.client.delete(f"organization/{org_name}/proxycache")
-            logging.info(f"Proxy cache for '{org_name}' deleted successfully.")
+            logging.info("Proxy cache for '%s' deleted successfully.", org_name)
             return response
         except Exception as e:
-            logging.error(f"Failed to delete proxy cache for '{org_name}': {e}")
-            raise
\ No newline at end of file
+            logging.error("Failed to delete proxy cache for '%s': %s", org_name, e)
+            raise
+
+    def ensure_proxy_caches(self, specs: Iterable, rotate_credentials: bool = False) -> List[Dict[str, Any]]:
+        """Creates or updates proxy caches so they match ``specs``, skipping identical ones.
+
+        Returns one result per org with status ``created``, ``updated``,
+        ``unchanged``, ``skipped`` (a credentialed config without its password,
+        see ``missing_credentials``) or ``failed``. A failed replacement
+        restores the previous config where possible and reports it.
+        """
+        results = []
+        for spec in _unique_specs(specs):
+            try:
+                current = self.get_proxy_cache(spec.org_name)
+                changed = proxy_cache_changes(current, spec, rotate_credentials)
+                if changed == []:
+                    results.append(_ensure_result(spec, "unchanged"))
+                    continue
+                if changed is None:
+                    self.create_proxy_cache(**spec.model_dump())
+                    results.append(_ensure_result(spec, "created"))
+                    continue
+                if missing_credentials(current, spec):
+                    results.append(_skipped_result(spec, changed))
+                    continue
+                results.append(self._replace(spec, current, changed))
+            except Exception as e:
+                results.append(_ensure_result(spec, "failed", error=str(e)))
+        logging.info("Proxy cache provisioning completed for %s organization(s).", len(results))
+        return results
+
+    def _replace(self, spec: ProxyCache, current: Dict[str, Any], changed: List[str]) -> Dict[str, Any]:
+        # Quay has no update call for proxy caches; replace the config and put
+        # the old one back if the new one is rejected.
+        self.delete_proxy_cache(spec.org_name)
+        try:
+            self.create_proxy_cache(**spec.model_dump())
+        except Exception as e:
+            restore_error = None
+            try:
+                restore = _restore_kwargs(current, spec.org_name)
+                if restore is None:
+                    raise _NotRestorable()
+                self.create_proxy_cache(**restore)
+            except Exception as restore_e:
+                restore_error = restore_e
+            return _replace_failed_result(spec, changed, current, e, restore_error)
+        return _ensure_result(spec, "updated", changed)
+
+
+class AsyncProxyCacheService:
+    def __init__(self, concurrency: int = DEFAULT_BULK_CONCURRENCY):
+        self.base_url, self.token = api_settings()
+        self.client = get_async_client(self.base_url, self.token)
+        self.concurrency = concurrency
+        logging.info("AsyncProxyCacheService initialized successfully")
+
+    async def create_proxy_cache(self, org_name: str, expiration_s: int = 86400, insecure: bool = False,
+                                 upstream_registry: str = "docker.io",
+                                 upstream_registry_username: str = None,
+                                 upstream_registry_password: str = None):
+        logging.info("Creating proxy cache for organization '%s'...", org_name)
+        data = _proxy_cache_payload(org_name, expiration_s, insecure, upstream_registry,
+                                    upstream_registry_username, upstream_registry_password)
+        try:
+            response = await self.client.post(f"organization/{org_name}/proxycache", data=json.dumps(data))
+            logging.info("Proxy cache for organization '%s' created successfully.", org_name)
+            return response
+        except Exception as e:
+            logging.error("Failed to create proxy cache for '%s': %s", org_name, e)
+            raise
+
+    async def get_proxy_cache(self, org_name: str):
+        logging.info("Fetching proxy cache for organization '%s'...", org_name)
+        try:
+            response = await self.client.get(f"organization/{org_name}/proxycache")
+            logging.info("Proxy cache for '%s' retrieved successfully.", org_name)
+            return response
+        except Exception as e:
+            logging.error("Failed to fetch proxy cache for '%s': %s", org_name, e)
+            raise
+
+    async def delete_proxy_cache(self, org_name: str):
+        logging.info("Deleting proxy cache for organization '%s'...", org_name)
+        try:
+            response = await self.client.delete(f"organization/{org_name}/proxycache")
+            logging.info("Proxy cache for '%s' deleted successfully.", org_name)
+            return response
+        except Exception as e:
+            logging.error("Failed to delete proxy cache for '%s': %s", org_name, e)
+            raise
+
+    async def ensure_proxy_caches(self, specs: Iterable, rotate_credentials: bool = False,
+                                  concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Concurrent variant of ``ProxyCacheService.ensure_proxy_caches``.
+
+        All current configs are read first, then only the orgs that actually
+        differ are written, both with at most ``concurrency`` calls in flight.
+        """
+        specs = _unique_specs(specs)
+        limit = concurrency or self.concurrency
+
+        async def read(spec):
+            try:
+                current = await self.get_proxy_cache(spec.org_name)
+                return spec, current, proxy_cache_changes(current, spec, rotate_credentials), None
+            except Exception as e:
+                return spec, None, None, str(e)
+
+        async def write(entry):
+            spec, current, changed, error = entry
+            if error is not None:
+                return _ensure_result(spec, "failed", error=error)
+            if changed == []:
+                return _ensure_result(spec, "unchanged")
+            if changed and missing_credentials(current, spec):
+                return _skipped_result(spec, changed)
+            try:
+                if changed:
+                    return await self._replace(spec, current, changed)
+                await self.create_proxy_cache(**spec.model_dump())
+                return _ensure_result(spec, "created")
+            except Exception as e:
+                return _ensure_result(spec, "failed", error=str(e))
+
+        current = await gather_bounded(read, specs, limit)
+        results = await gather_bounded(write, current, limit)
+        logging.info("Proxy cache provisioning completed for %s organization(s).", len(results))
+        return results
+
+    async def _replace(self, spec: ProxyCache, current: Dict[str, Any], changed: List[str]) -> Dict[str, Any]:
+        await self.delete_proxy_cache(spec.org_name)
+        try:
+            await self.create_proxy_cache(**spec.model_dump())
+        except Exception as e:
+            restore_error = None
+            try:
+                restore = _restore_kwargs(current, spec.org_name)
+                if restore is None:
+                    raise _NotRestorable()
+                await self.create_proxy_cache(**restore)
+            except Exception as restore_e:
+                restore_error = restore_e
+            return _replace_failed_result(spec, changed, current, e, restore_error)
+        return _ensure_result(spec, "updated", changed)
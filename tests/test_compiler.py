@@ -0,0 +1,29 @@
+import pytest
+
+from pipeline.compiler import PlanCompiler
+
+
+def write_struct(tmp_path, params):
+    inputs = tmp_path / "inputs.yaml"
+    inputs.write_text("organization: my-org\n")
+    struct = tmp_path / "struct.yaml"
+    struct.write_text(f"input_file: {inputs}\npipeline:\n"
+                      f"  - name: step\n    job: ensure-organization\n    enabled: true\n    params: {params}\n")
+    return struct
+
+
+def compiled_params(cache_dir, struct):
+    return [dict(step.params) for step in PlanCompiler(cache_dir).compile(struct).steps]
+
+
+@pytest.mark.parametrize("params, cached", [
+    ("{name: '{{ inputs.organization }}'}", True),
+    ("{ports: {80: http, 443: https}}", False),
+    ("{since: 2024-01-02}", False),
+])
+def test_cached_plan_matches_cold_compile(tmp_path, params, cached):
+    struct = write_struct(tmp_path, params)
+    cache_dir = tmp_path / "plans"
+    cold = compiled_params(cache_dir, struct)
+    assert any(cache_dir.glob("*.json")) is cached
+    assert compiled_params(cache_dir, struct) == cold
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from models.quay_config import QuayConfig
+from reader import yaml_ops
+from reader.config_cache import ParsedConfigCache, etag_matches
+
+
+def write_same_tick(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_same_tick_rewrite_is_seen_after_fingerprint_settles(tmp_path, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text("organizations:\n- name: aaaa\n  email: a@example.com\n")
+    mtime_ns = config.stat().st_mtime_ns
+    cache = ParsedConfigCache(config, QuayConfig)
+    assert cache.get().model.organizations[0].name == "aaaa"
+
+    # Same size and mtime, different content, while the fingerprint is still unsettled.
+    write_same_tick(config, "organizations:\n- name: bbbb\n  email: a@example.com\n", mtime_ns)
+    monkeypatch.setattr(yaml_ops, "FINGERPRINT_SETTLE_NS", 0)
+    assert cache.get().model.organizations[0].name == "bbbb"
+
+
+def test_settled_fingerprint_skips_rehash(tmp_path, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text("organizations: []\n")
+    monkeypatch.setattr(yaml_ops, "FINGERPRINT_SETTLE_NS", 0)
+    cache = ParsedConfigCache(config, QuayConfig)
+    first = cache.get()
+    monkeypatch.setattr("reader.config_cache.get_yaml_hash", lambda path: pytest.fail("rehashed"))
+    assert cache.get() is first
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('*', True),
+    ('"ab"', False),
+    ('"abcd"', False),
+    ('"x""abc"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
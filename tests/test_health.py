@@ -0,0 +1,46 @@
+import pytest
+
+from bench.fake_quay import FakeQuay
+from health.prober import HealthProber
+
+
+@pytest.fixture
+def quay(request, monkeypatch):
+    with FakeQuay(**getattr(request, "param", {})) as quay:
+        monkeypatch.setenv("API_BASE_URL", quay.url)
+        monkeypatch.setenv("API_TOKEN", "token")
+        yield quay
+
+
+def test_ready_when_quay_answers(quay):
+    prober = HealthProber(timeout=2)
+    prober.probe()
+    state = prober.state()
+    assert state["status"] == "ready"
+    assert state["api"] == {"status": "ok", "reason": "success"}
+    assert state["consecutive_failures"] == 0
+
+
+@pytest.mark.parametrize("quay", [{"error_rate": 1.0}], indirect=True)
+def test_not_ready_when_quay_fails_every_probe(quay):
+    prober = HealthProber(timeout=2)
+    prober.probe()
+    prober.probe()
+    state = prober.state()
+    assert state["status"] == "not ready"
+    assert state["api"] == {"status": "error", "reason": "server error (503)"}
+    assert state["consecutive_failures"] == 2
+
+
+def test_not_ready_when_quay_is_unreachable(monkeypatch):
+    with FakeQuay() as quay:
+        url = quay.url
+    monkeypatch.setenv("API_BASE_URL", url)
+    prober = HealthProber(timeout=2)
+    prober.probe()
+    assert prober.state()["status"] == "not ready"
+    assert prober.state()["api"]["status"] == "error"
+
+
+def test_not_ready_before_first_probe():
+    assert HealthProber().state()["status"] == "not ready"
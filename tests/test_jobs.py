@@ -0,0 +1,116 @@
+import time
+
+from jobs.handlers import enqueue_reconcile, reconcile_handlers, ORGANIZATION_UPDATE, RECONCILE
+from jobs.leader import LeaderElection
+from jobs.queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+def expire_lease(queue, job_id):
+    with queue.transaction() as conn:
+        conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=30)
+    job = queue.enqueue("work", {"n": 1})
+    assert queue.claim("a").id == job.id
+    assert queue.claim("b") is None
+
+    expire_lease(queue, job.id)
+    reclaimed = queue.claim("b")
+    assert reclaimed.id == job.id
+    assert reclaimed.lease_owner == "b"
+    assert reclaimed.attempts == 2
+
+
+def test_expired_lease_out_of_attempts_fails(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    job = queue.enqueue("work", max_attempts=1)
+    queue.claim("a")
+    expire_lease(queue, job.id)
+    assert queue.claim("b") is None
+    assert queue.get(job.id).status == FAILED
+
+
+def test_stale_owner_cannot_complete_or_fail(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    job = queue.enqueue("work")
+    queue.claim("a")
+    expire_lease(queue, job.id)
+    queue.claim("b")
+
+    assert not queue.complete(job.id, "a", "stale")
+    assert not queue.fail(job.id, "a", "stale")
+    assert not queue.heartbeat(job.id, "a")
+    assert queue.get(job.id).status == RUNNING
+
+    assert queue.complete(job.id, "b", "fresh")
+    done = queue.get(job.id)
+    assert (done.status, done.result) == (DONE, "fresh")
+
+
+def test_leader_takeover_after_lease_expires(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    first = LeaderElection(queue, identity="a", lease_seconds=0.2)
+    second = LeaderElection(queue, identity="b", lease_seconds=0.2)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    time.sleep(0.3)
+    assert not first.is_leader
+    assert second.try_acquire()
+    assert second.term == first.term + 1
+    assert not first.try_acquire()
+
+
+def test_leader_prunes_finished_jobs(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    done = queue.enqueue("work", idempotency_key="key")
+    queue.claim("a")
+    queue.complete(done.id, "a")
+    pending = queue.enqueue("work")
+
+    leader = LeaderElection(queue, identity="a", retention_seconds=-1)
+    assert leader.prune_if_due() == 0
+    leader.try_acquire()
+    assert leader.prune_if_due() == 1
+    assert queue.get(done.id) is None
+    assert queue.get(pending.id).status == PENDING
+    assert queue.enqueue("work", idempotency_key="key").id != done.id
+
+
+def test_reconcile_plans_from_queued_revision(tmp_path, monkeypatch):
+    class Plan:
+        create, update = [], []
+
+        def to_dict(self):
+            return {}
+
+    class Planner:
+        def plan(self, config):
+            planned.append(config)
+            return Plan()
+
+    planned = []
+    monkeypatch.setattr("services.container.get_organization_planner", Planner)
+    queue = JobQueue(tmp_path / "jobs.db")
+    handlers = reconcile_handlers(queue, lambda revision: f"config@{revision}")
+    job = enqueue_reconcile(queue, {"revision": 3})
+    handlers[RECONCILE](job.payload)
+    assert planned == ["config@3"]
+
+
+def test_superseded_revision_is_skipped(tmp_path, monkeypatch):
+    def fail(*args):
+        raise AssertionError("superseded job must not run")
+
+    monkeypatch.setattr("services.container.get_organization_planner", fail)
+    monkeypatch.setattr("services.container.get_organization_service", fail)
+    queue = JobQueue(tmp_path / "jobs.db")
+    handlers = reconcile_handlers(queue, fail)
+    stale = enqueue_reconcile(queue, {"revision": 3})
+    enqueue_reconcile(queue, {"revision": 4})
+
+    assert handlers[RECONCILE](stale.payload) == {"skipped": "superseded by revision 4"}
+    update = handlers[ORGANIZATION_UPDATE]({"name": "org", "email": "old@example.com", "revision": 3})
+    assert update == {"skipped": "superseded by revision 4"}
@@ -0,0 +1,29 @@
+import threading
+
+from pipeline import journal
+from pipeline.journal import StepJournal
+
+
+def test_compaction_keeps_concurrent_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "COMPACT_FACTOR", 1)
+    path = tmp_path / "journal" / "struct.jsonl"
+    # Separate instances share only the file lock, like separate processes.
+    compactor = StepJournal(path)
+    for _ in range(5):
+        compactor.record("seed", "h", "succeeded")
+
+    def append(writer):
+        appender = StepJournal(path)
+        for i in range(50):
+            appender.record(f"{writer}-{i}", "h", "succeeded")
+            appender.record(f"{writer}-{i}", "h", "succeeded")
+
+    writers = [threading.Thread(target=append, args=(n,)) for n in range(3)]
+    for thread in writers:
+        thread.start()
+    while any(thread.is_alive() for thread in writers):
+        compactor.load()
+    for thread in writers:
+        thread.join()
+
+    assert set(StepJournal(path).load()) == {"seed"} | {f"{w}-{i}" for w in range(3) for i in range(50)}
@@ -0,0 +1,61 @@
+import pytest
+
+from api.rate_limit import get_limiter
+from bench.fake_quay import FakeQuay
+from models.quay_config import Organization, QuayConfig
+from services.organization_planner import OrganizationPlanner, build_plan
+from services.organization_service import OrganizationService
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    with FakeQuay() as quay:
+        monkeypatch.setenv("API_BASE_URL", quay.url)
+        monkeypatch.setenv("API_TOKEN", "token")
+        get_limiter(quay.url).rate = 1000
+        quay.seed_organizations(3)
+        yield OrganizationPlanner(OrganizationService()), quay
+
+
+def config(*orgs):
+    return QuayConfig(organizations=[Organization(**org) for org in orgs])
+
+
+DESIRED = config(
+    {"name": "org0", "email": "org0@example.com"},
+    {"name": "org1", "email": "changed@example.com"},
+    {"name": "org2"},
+    {"name": "new", "email": "new@example.com"},
+    {"name": "no-email"},
+)
+
+
+def test_plan_against_live_organizations(planner):
+    planner, _ = planner
+    plan = planner.plan(DESIRED)
+    assert plan.to_dict() == {
+        "create": [{"name": "new", "email": "new@example.com"}],
+        "update": [{"name": "org1", "email": "changed@example.com", "old_email": "org1@example.com"}],
+        "delete": [],
+        "skipped": ["no-email"],
+        "unchanged": 2,
+    }
+
+
+def test_applied_plan_converges(planner):
+    planner, quay = planner
+    results = planner.apply(planner.plan(DESIRED))
+    assert [(r["name"], r["status"]) for r in results] == [("new", "created"), ("org1", "updated")]
+    assert quay.organizations["org1"]["email"] == "changed@example.com"
+    assert planner.plan(DESIRED).is_empty()
+
+
+def test_prune_plans_deletes_for_unmanaged_organizations(planner):
+    planner, _ = planner
+    plan = planner.plan(config({"name": "org0", "email": "org0@example.com"}), prune=True)
+    assert plan.delete == ["org1", "org2"]
+
+
+def test_duplicate_desired_organization_keeps_first_entry():
+    desired = [Organization(name="a", email="first@example.com"), Organization(name="a", email="second@example.com")]
+    assert build_plan(desired, []).create == [{"name": "a", "email": "first@example.com"}]
@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+
+import pytest
+
+from api import pagination
+
+
+class Pages:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get(self, endpoint, params=None):
+        return self.pages[int((params or {}).get("next_page", 0))]
+
+
+class RecordingFuture(Future):
+    collected = False
+
+    def exception(self, timeout=None):
+        self.collected = True
+        return super().exception(timeout)
+
+
+class DeferredExecutor:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = RecordingFuture()
+        self.futures.append(future)
+        return future
+
+
+PAGES = [{"items": [1, 2], "next_page": "1"}, {"items": [3]}]
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = DeferredExecutor()
+    monkeypatch.setattr(pagination, "_prefetch_executor", executor)
+    return executor
+
+
+def test_prefetch_cancelled_when_closed_early(executor):
+    items = pagination.iter_paginated(Pages(PAGES), "/items", "items")
+    assert next(items) == 1
+    items.close()
+    assert executor.futures[0].cancelled()
+
+
+def test_prefetch_cancelled_when_predicate_raises(executor):
+    def predicate(item):
+        raise ValueError("bad item")
+
+    with pytest.raises(ValueError):
+        list(pagination.iter_paginated(Pages(PAGES), "/items", "items", predicate=predicate))
+    assert executor.futures[0].cancelled()
+
+
+def test_follows_next_page_tokens():
+    assert list(pagination.iter_paginated(Pages(PAGES), "/items", "items")) == [1, 2, 3]
+
+
+def test_running_prefetch_outcome_is_collected(executor):
+    items = pagination.iter_paginated(Pages(PAGES), "/items", "items")
+    next(items)
+    future = executor.futures[0]
+    future.set_running_or_notify_cancel()
+    items.close()
+    assert not future.cancelled()
+    future.set_exception(RuntimeError("boom"))
+    assert future.collected
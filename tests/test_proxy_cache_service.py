@@ -0,0 +1,42 @@
+import pytest
+
+from api.rate_limit import get_limiter
+from bench.fake_quay import FakeQuay
+from services.porxy_cache_service import ProxyCacheService
+
+CREDENTIALED = {"upstream_registry": "registry.example.com", "expiration_s": 86400, "insecure": False,
+                "upstream_registry_username": "robot"}
+
+
+@pytest.fixture
+def quay(monkeypatch):
+    with FakeQuay() as quay:
+        monkeypatch.setenv("API_BASE_URL", quay.url)
+        monkeypatch.setenv("API_TOKEN", "token")
+        get_limiter(quay.url).rate = 1000
+        quay.seed_organizations(1)
+        quay.proxy_caches["org0"] = dict(CREDENTIALED)
+        yield quay
+
+
+def ensure(spec):
+    return ProxyCacheService().ensure_proxy_caches([{"org_name": "org0", **spec}])[0]
+
+
+def test_spec_without_username_clears_credentials(quay):
+    result = ensure({"upstream_registry": "registry.example.com"})
+    assert result["status"] == "updated"
+    assert not quay.proxy_caches["org0"].get("upstream_registry_username")
+
+
+def test_registry_change_keeping_username_needs_password(quay):
+    result = ensure({"upstream_registry": "mirror.example.com", "upstream_registry_username": "robot"})
+    assert result["status"] == "skipped"
+    assert quay.proxy_caches["org0"] == CREDENTIALED
+
+
+def test_registry_change_with_password_replaces_config(quay):
+    result = ensure({"upstream_registry": "mirror.example.com", "upstream_registry_username": "robot",
+                     "upstream_registry_password": "secret"})
+    assert result["status"] == "updated"
+    assert quay.proxy_caches["org0"]["upstream_registry"] == "mirror.example.com"
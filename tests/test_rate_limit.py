@@ -0,0 +1,66 @@
+import time
+
+import pytest
+import requests
+
+from api.client import ApiClient
+from api.rate_limit import RetryBudget, TokenBucket, get_limiter, parse_retry_after
+from bench.fake_quay import FakeQuay
+
+
+def test_throttle_halves_rate_once_per_interval():
+    bucket = TokenBucket(rate=40, min_rate=1, decrease_interval=60)
+    bucket.on_throttled()
+    bucket.on_throttled()
+    assert bucket.rate == 20
+
+
+def test_rate_never_drops_below_minimum():
+    bucket = TokenBucket(rate=4, min_rate=3, decrease_interval=0)
+    bucket.on_throttled()
+    bucket.on_throttled()
+    assert bucket.rate == 3
+
+
+def test_success_grows_rate_additively_up_to_maximum():
+    bucket = TokenBucket(rate=10, max_rate=10.5, increase=1.0)
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(10.1)
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 10.5
+
+
+def test_retry_after_pauses_every_caller():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.on_throttled(retry_after=0.5)
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_retry_budget_runs_out():
+    budget = RetryBudget(ratio=0.5, min_per_sec=0, capacity=2)
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_withdraw()
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("3", 3.0), ("-1", 0.0), ("soon", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_client_backs_off_on_429_and_gives_up_after_max_retries():
+    with FakeQuay(throttle_rate=1.0, retry_after=0) as quay:
+        limiter = get_limiter(quay.url)
+        limiter.rate = 100
+        client = ApiClient(quay.url, max_retries=2)
+        client.cache.ttl = 0
+        started = time.monotonic()
+        with pytest.raises(requests.HTTPError) as raised:
+            client.get("superuser/organizations/")
+        assert raised.value.response.status_code == 429
+        assert quay.counters["throttled"] == 3
+        assert limiter.rate == 50
+        assert time.monotonic() - started < 5
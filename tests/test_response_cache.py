@@ -0,0 +1,77 @@
+import json
+import time
+
+import pytest
+
+from api.cache import ResponseCache
+from api.client import ApiClient
+from api.rate_limit import get_limiter
+from bench.fake_quay import FakeQuay
+
+LIST = "superuser/organizations/"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.store(("a", ()), "A")
+    cache.store(("b", ()), "B")
+    cache.lookup(("a", ()))
+    cache.store(("c", ()), "C")
+    assert cache.lookup(("b", ()))[0] is None
+    assert cache.lookup(("a", ()))[0].body == "A"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_kept_only_with_an_etag():
+    cache = ResponseCache(ttl=0.01)
+    cache.store(("tagged", ()), "T", etag='"1"')
+    cache.store(("plain", ()), "P")
+    time.sleep(0.02)
+    entry, fresh = cache.lookup(("tagged", ()))
+    assert entry.etag == '"1"' and not fresh
+    assert cache.lookup(("plain", ()))[0] is None
+
+
+def test_invalidate_drops_resource_children_and_parents():
+    cache = ResponseCache(ttl=60)
+    for path in ("organization", "organization/a", "organization/a/proxycache", "organization/b"):
+        cache.store((path, ()), path)
+    cache.invalidate("organization/a")
+    assert [path for path in ("organization", "organization/a", "organization/a/proxycache", "organization/b")
+            if cache.lookup((path, ()))[0] is not None] == ["organization/b"]
+
+
+def test_store_after_invalidation_is_discarded():
+    cache = ResponseCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate("organization/a")
+    cache.store(("organization/a", ()), "stale", generation=generation)
+    assert cache.lookup(("organization/a", ()))[0] is None
+
+
+@pytest.fixture
+def quay():
+    with FakeQuay() as quay:
+        get_limiter(quay.url).rate = 1000
+        quay.seed_organizations(2)
+        yield quay
+
+
+def test_write_invalidates_cached_list(quay):
+    client = ApiClient(quay.url)
+    assert len(client.get(LIST)["organizations"]) == 2
+    assert len(client.get(LIST)["organizations"]) == 2
+    assert quay.counters["requests"] == 1
+
+    client.post("organization/", data=json.dumps({"name": "new", "email": "new@example.com"}), invalidates=[LIST])
+    assert [org["name"] for org in client.get(LIST)["organizations"]] == ["new", "org0", "org1"]
+
+
+def test_expired_entry_is_revalidated_with_etag(quay):
+    client = ApiClient(quay.url)
+    client.cache.ttl = 0.01
+    first = client.get(LIST)
+    time.sleep(0.02)
+    assert client.get(LIST) == first
+    assert quay.counters["not_modified"] == 1
+    assert client.cache.stats()["revalidations"] == 1
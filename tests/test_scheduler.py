@@ -0,0 +1,37 @@
+import pytest
+
+from pipeline.scheduler import PipelineError, expand_steps
+
+
+def needs(pipeline):
+    return {step.id: step.needs for step in expand_steps(pipeline, lambda value, extra: value)}
+
+
+def test_needs_on_disabled_step_inherits_its_needs_transitively():
+    pipeline = [
+        {"name": "a", "job": "x", "enabled": True, "needs": []},
+        {"name": "b", "job": "x", "enabled": True, "needs": []},
+        {"name": "c", "job": "x", "enabled": False, "needs": ["a"]},
+        {"name": "d", "job": "x", "enabled": False, "needs": ["c", "b"]},
+        {"name": "e", "job": "x", "enabled": True, "needs": ["d"]},
+    ]
+    assert needs(pipeline)["e"] == ["a", "b"]
+
+
+def test_disabled_step_without_needs_follows_previous_enabled_step():
+    pipeline = [
+        {"name": "a", "job": "x", "enabled": True},
+        {"name": "b", "job": "x", "enabled": True, "needs": []},
+        {"name": "c", "job": "x", "enabled": False},
+        {"name": "d", "job": "x", "enabled": True, "needs": ["c"]},
+    ]
+    assert needs(pipeline) == {"a": [], "b": [], "d": ["b"]}
+
+
+def test_unknown_need_behind_disabled_step_is_rejected():
+    pipeline = [
+        {"name": "c", "job": "x", "enabled": False, "needs": ["missing"]},
+        {"name": "d", "job": "x", "enabled": True, "needs": ["c"]},
+    ]
+    with pytest.raises(PipelineError):
+        expand_steps(pipeline, lambda value, extra: value)
@@ -0,0 +1,22 @@
+import datetime
+
+from reader import snapshot_store
+from reader.snapshot_store import SnapshotStore
+
+
+def test_revisions_round_trip_keys_and_dates(tmp_path):
+    first = {"organizations": [{"name": "a", "created": datetime.date(2024, 1, 2)}], 1: "one"}
+    second = {"organizations": [{"name": "a", "created": datetime.date(2024, 1, 3)}], 1: "uno", 2.5: None}
+    store = SnapshotStore(tmp_path)
+    with store.lock():
+        store.commit(first, "h1")
+        store.commit(second, "h2")
+
+    fresh = SnapshotStore(tmp_path)
+    assert fresh.load(1) == first
+    assert fresh.load(2) == second
+    assert list(fresh.load(2)) == ["organizations", 1, 2.5]
+
+
+def test_plain_payload_keeps_fast_encoding():
+    assert snapshot_store._encode({"base": {"a": [1, 2]}})[:1] in (b"M", b"J")
@@ -0,0 +1,36 @@
+from reader.yaml_diff import changed_items, diff_yaml
+
+
+def config(role="admin", teams=("t1",), email="a@example.com"):
+    return {
+        "organizations": [
+            {"name": "a", "email": email,
+             "teams": [{"name": team, "role": role} for team in teams]},
+            {"name": "b", "email": "b@example.com", "teams": []},
+        ]
+    }
+
+
+def test_named_list_item_is_matched_by_name():
+    diffs = diff_yaml(config(), config(email="new@example.com"))
+    assert diffs == {
+        "/organizations/a/email": {
+            "status": "modified", "old_value": "a@example.com", "new_value": "new@example.com",
+            "item": "a", "items": {"/organizations": "a"},
+        }
+    }
+
+
+def test_nested_named_list_keeps_outer_item():
+    diffs = diff_yaml(config(), config(role="member"))
+    entry = diffs["/organizations/a/teams/t1/role"]
+    assert entry["item"] == "a"
+    assert entry["items"] == {"/organizations": "a", "/organizations/a/teams": "t1"}
+    assert changed_items(diffs, "/organizations") == {"added": [], "removed": [], "modified": ["a"]}
+    assert changed_items(diffs, "/organizations/a/teams") == {"added": [], "removed": [], "modified": ["t1"]}
+
+
+def test_nested_named_list_added_item():
+    diffs = diff_yaml(config(), config(teams=("t1", "t2")))
+    assert changed_items(diffs, "/organizations") == {"added": [], "removed": [], "modified": ["a"]}
+    assert changed_items(diffs, "/organizations/a/teams") == {"added": ["t2"], "removed": [], "modified": []}
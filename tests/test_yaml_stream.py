@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from reader.yaml_stream import YamlStreamError, iter_organizations
+
+
+def names(text):
+    return [org.name for org in iter_organizations(io.StringIO(text))]
+
+
+def test_streams_organizations_list():
+    assert names("version: 1\norganizations:\n- name: a\n  email: a@example.com\n") == ["a"]
+
+
+def test_streams_aliased_organizations_list():
+    text = ("shared: &orgs\n- name: a\n  email: a@example.com\n"
+            "organizations: *orgs\n")
+    assert names(text) == ["a"]
+
+
+@pytest.mark.parametrize("value, line, got", [
+    ("", 2, "null"),
+    ("\n  name: a\n  email: a@example.com", 3, "a mapping"),
+    (" none", 2, "'none'"),
+])
+def test_organizations_must_be_a_list(value, line, got):
+    with pytest.raises(YamlStreamError) as raised:
+        names(f"version: 1\norganizations:{value}\n")
+    assert raised.value.line == line
+    assert str(raised.value) == f"line {line}: organizations must be a list, got {got}"
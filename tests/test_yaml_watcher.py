@@ -0,0 +1,35 @@
+import time
+
+from reader.yaml_diff import check_yaml_change
+from reader.yaml_watcher import YamlWatcher
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_watcher_does_not_consume_explicit_checks(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text("organizations:\n- name: a\n  email: a@example.com\n")
+    storage = tmp_path / "storage"
+    assert check_yaml_change(storage, config)["status"] == "changed"
+
+    seen = []
+    watcher = YamlWatcher(config, storage / "watcher", reconcile=seen.append, debounce=0.05, poll_interval=0.1)
+    watcher.start()
+    try:
+        assert wait_for(lambda: len(seen) == 1)
+        config.write_text("organizations:\n- name: a\n  email: b@example.com\n")
+        assert wait_for(lambda: len(seen) == 2)
+    finally:
+        watcher.stop()
+
+    assert seen[1]["revision"] == 2
+    result = check_yaml_change(storage, config)
+    assert result["status"] == "changed"
+    assert result["revision"] == 2